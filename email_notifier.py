@@ -5,21 +5,130 @@ Sends success/failure notifications with detailed pipeline summaries.
 Based on the email system from stock-monitor project.
 """
 
+import atexit
 import json
 import smtplib
 import os
+import queue
+import threading
 from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Dict, Optional
 import pytz
 
+class SMTPPool:
+    """Bounded pool of authenticated SMTP connections reused across notifications."""
+    
+    def __init__(self, size: int, host: str, port: int, user: str, pw: str,
+                 max_msgs_per_conn: int = 4000, smtp_factory=smtplib.SMTP):
+        """Create the pool; connections are opened lazily on first send."""
+        self.size = size
+        self.host = host
+        self.port = port
+        self.user = user
+        self.pw = pw
+        self.max_msgs_per_conn = max_msgs_per_conn
+        self.smtp_factory = smtp_factory
+        self.connect_count = 0
+        
+        # Each slot is a (SMTP or None, msg_count) tuple
+        self._slots = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._slots.put((None, 0))
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        """Open a new TLS connection and authenticate."""
+        server = self.smtp_factory(self.host, self.port)
+        server.starttls()
+        server.login(self.user, self.pw)
+        with self._lock:
+            self.connect_count += 1
+        return server
+    
+    @staticmethod
+    def _quit(server):
+        """Close a connection, ignoring errors from already-dropped sockets."""
+        if server is None:
+            return
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+    
+    def _is_healthy(self, server) -> bool:
+        """Check an idle connection with NOOP before reusing it."""
+        try:
+            status = server.noop()[0]
+        except (smtplib.SMTPException, OSError):
+            return False
+        return status == 250
+    
+    def send(self, msg):
+        """Send a message on a pooled connection, recycling it at the per-connection cap."""
+        server, count = self._slots.get()
+        try:
+            if server is not None and not self._is_healthy(server):
+                self._quit(server)
+                server, count = None, 0
+            if server is None:
+                server, count = self._connect(), 0
+            
+            server.send_message(msg)
+            count += 1
+            
+            # Stay under provider per-connection message caps
+            if count >= self.max_msgs_per_conn:
+                self._quit(server)
+                server, count = None, 0
+        except Exception:
+            self._quit(server)
+            server, count = None, 0
+            raise
+        finally:
+            self._slots.put((server, count))
+    
+    def close(self):
+        """Quit all pooled connections."""
+        for _ in range(self.size):
+            server, _count = self._slots.get()
+            self._quit(server)
+            self._slots.put((None, 0))
+
 class PipelineEmailNotifier:
     """Email notifier for OHLCV pipeline results."""
     
-    def __init__(self, config_file: str = 'email_config.json'):
-        """Initialize with email configuration."""
+    def __init__(self, config_file: str = 'email_config.json', smtp_factory=smtplib.SMTP):
+        """Initialize with email configuration; the SMTP pool is built on first send."""
         self.config = self.load_email_config(config_file)
+        self.smtp_factory = smtp_factory
+        self.pool = None
+        self._pool_lock = threading.Lock()
+    
+    def _get_pool(self) -> SMTPPool:
+        """Return the SMTP pool, creating it from the config on first use."""
+        with self._pool_lock:
+            if self.pool is None:
+                self.pool = SMTPPool(
+                    size=1,
+                    host=self.config['smtp_server'],
+                    port=self.config['smtp_port'],
+                    user=self.config['sender_email'],
+                    pw=self.config['sender_password'],
+                    smtp_factory=self.smtp_factory
+                )
+                # Only notifiers that opened connections get an exit hook
+                atexit.register(self.close)
+            return self.pool
+    
+    def close(self):
+        """Quit any pooled SMTP connections."""
+        with self._pool_lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            atexit.unregister(self.close)
+            pool.close()
         
     def load_email_config(self, config_file: str) -> Dict:
         """Load email configuration from JSON file or environment variables."""
@@ -151,10 +260,7 @@ class PipelineEmailNotifier:
             
             msg.attach(MIMEText(body, 'html', 'utf-8'))
             
-            with smtplib.SMTP(self.config['smtp_server'], self.config['smtp_port']) as server:
-                server.starttls()
-                server.login(self.config['sender_email'], self.config['sender_password'])
-                server.send_message(msg)
+            self._get_pool().send(msg)
             
             print(f"✅ Success notification sent to {self.config['recipient_email']}")
             return True
@@ -228,10 +334,7 @@ class PipelineEmailNotifier:
             
             msg.attach(MIMEText(body, 'html', 'utf-8'))
             
-            with smtplib.SMTP(self.config['smtp_server'], self.config['smtp_port']) as server:
-                server.starttls()
-                server.login(self.config['sender_email'], self.config['sender_password'])
-                server.send_message(msg)
+            self._get_pool().send(msg)
             
             print(f"📧 Failure notification sent to {self.config['recipient_email']}")
             return True
@@ -13,7 +13,6 @@ from typing import List, Dict, Any, Optional, Tuple
 import os
 import sys
 
-import requests
 import pandas as pd
 import pyarrow as pa
 import pyarrow.parquet as pq
@@ -21,6 +20,8 @@ import boto3
 import snowflake.connector
 from botocore.exceptions import ClientError, NoCredentialsError
 
+from polygon_client import SESSION as POLYGON_SESSION
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -44,6 +45,7 @@ class IncrementalOHLCVPipeline:
         self.polygon_api_key = self._get_polygon_api_key()
         self.s3_client = None
         self.snowflake_conn = None
+        self._tickers = None  # Cached ticker list from the source table
         
         # Pipeline constants
         self.S3_BUCKET = 'sp500-top-10-sector-leaders-ohlcv-s3bkt'
@@ -115,6 +117,9 @@ class IncrementalOHLCVPipeline:
     
     def get_all_tickers_from_snowflake(self) -> List[str]:
         """Retrieve all ticker symbols from the Snowflake source table."""
+        if self._tickers is not None:
+            return list(self._tickers)
+        
         try:
             if not self.snowflake_conn:
                 self.snowflake_conn = self._initialize_snowflake_connection()
@@ -131,12 +136,34 @@ class IncrementalOHLCVPipeline:
             logger.info(f"Retrieved {len(tickers)} ticker symbols from Snowflake")
             logger.info(f"Sample tickers: {tickers[:10]}")
             
-            return tickers
+            self._tickers = tickers
+            return list(tickers)
             
         except Exception as e:
             logger.error(f"Failed to retrieve tickers from Snowflake: {e}")
             raise
     
+    def sample_tickers_from_snowflake(self, n: int = 5) -> List[str]:
+        """Retrieve a small sample of ticker symbols without reading the full table."""
+        try:
+            if not self.snowflake_conn:
+                self.snowflake_conn = self._initialize_snowflake_connection()
+            
+            cursor = self.snowflake_conn.cursor()
+            
+            query = f"SELECT DISTINCT TICKER_SYMBOL FROM {self.TICKER_SOURCE_TABLE} LIMIT %s"
+            cursor.execute(query, (n,))
+            
+            tickers = [row[0] for row in cursor.fetchall()]
+            cursor.close()
+            
+            logger.info(f"Sampled {len(tickers)} ticker symbols from Snowflake")
+            return tickers
+            
+        except Exception as e:
+            logger.error(f"Failed to sample tickers from Snowflake: {e}")
+            raise
+    
     def get_max_date_for_ticker(self, ticker: str) -> Optional[str]:
         """Get the maximum date for which OHLCV data exists for a specific ticker."""
         try:
@@ -168,14 +195,54 @@ class IncrementalOHLCVPipeline:
             logger.error(f"Failed to get max date for {ticker}: {e}")
             return None
     
+    def get_max_dates_for_tickers(self, tickers: List[str]) -> Dict[str, Optional[str]]:
+        """Get the maximum stored OHLCV date for several tickers in one query."""
+        max_dates = {ticker: None for ticker in tickers}
+        if not tickers:
+            return max_dates
+        
+        try:
+            if not self.snowflake_conn:
+                self.snowflake_conn = self._initialize_snowflake_connection()
+            
+            cursor = self.snowflake_conn.cursor()
+            
+            # Single grouped query instead of one round-trip per ticker
+            placeholders = ', '.join(['%s'] * len(tickers))
+            query = (
+                f"SELECT TICKER, MAX(OHLC_DATE) FROM {self.SNOWFLAKE_TABLE} "
+                f"WHERE TICKER IN ({placeholders}) GROUP BY TICKER"
+            )
+            cursor.execute(query, tuple(tickers))
+            
+            rows = cursor.fetchall()
+            cursor.close()
+            
+            for ticker, max_date in rows:
+                if max_date is None:
+                    continue
+                if isinstance(max_date, datetime):
+                    max_dates[ticker] = max_date.strftime('%Y-%m-%d')
+                else:
+                    max_dates[ticker] = str(max_date)
+            
+            logger.info(f"Retrieved max dates for {len(rows)}/{len(tickers)} tickers")
+            return max_dates
+            
+        except Exception as e:
+            # Same fallback as the per-ticker lookup: treat every ticker as having no data
+            logger.error(f"Failed to get max dates for {len(tickers)} tickers: {e}")
+            return max_dates
+    
     def get_ticker_date_ranges(self) -> Dict[str, Tuple[str, str]]:
         """Get start and end dates for each ticker based on existing data."""
         try:
             tickers = self.get_all_tickers_from_snowflake()
+            max_dates = self.get_max_dates_for_tickers(tickers)
             ticker_ranges = {}
             
             for ticker in tickers:
-                max_date = self.get_max_date_for_ticker(ticker)
+                max_date = max_dates[ticker]
                 
                 if max_date:
                     # Start from the day after the max date
@@ -214,7 +281,7 @@ class IncrementalOHLCVPipeline:
         
         try:
             logger.info(f"Fetching data for {ticker} from {start_date} to {end_date}")
-            response = requests.get(url, params=params, timeout=30)
+            response = POLYGON_SESSION.get(url, params=params, timeout=30)
             response.raise_for_status()
             
             data = response.json()
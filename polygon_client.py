@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Shared Polygon.io HTTP Client
+Provides a pooled requests session so Polygon.io API calls reuse keep-alive connections,
+and a rate limiter that spaces calls made from several threads.
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def build_session(pool_maxsize: int = 8, total_retries: int = 3,
+                  backoff_factor: float = 0.3) -> requests.Session:
+    """Create a session with a keep-alive connection pool and retry policy (429/5xx are retried)."""
+    session = requests.Session()
+    retry = Retry(
+        total=total_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504]
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount('https://', adapter)
+    return session
+
+
+# Module-level session shared by every Polygon.io caller in this process
+SESSION = build_session()
+
+
+class RateLimiter:
+    """Spaces calls at least ``interval`` seconds apart, across all threads sharing the limiter."""
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+    
+    def wait(self) -> float:
+        """Block until the caller's slot comes up; returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._next_slot - now)
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay:
+            time.sleep(delay)
+        return delay
+    
+    def update(self, headers) -> None:
+        """Follow the server's X-RateLimit-* response headers when it sends them.
+        
+        While the server reports quota left, calls are no longer spaced by ``interval``;
+        once it reports none left, every caller waits until the reported reset.
+        """
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        try:
+            remaining = int(remaining)
+            reset = float(headers.get('X-RateLimit-Reset', 0))
+        except ValueError:
+            return
+        
+        # Reset is either an epoch timestamp or seconds from now
+        reset_in = reset - time.time() if reset > 1e9 else reset
+        with self._lock:
+            self.interval = 0.0
+            if remaining > 0:
+                self._next_slot = min(self._next_slot, time.monotonic())
+            else:
+                self._next_slot = max(self._next_slot, time.monotonic() + max(0.0, reset_in))
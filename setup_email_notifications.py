@@ -7,8 +7,22 @@ Interactive script to configure email credentials for pipeline notifications.
 import json
 import getpass
 import os
+from functools import lru_cache
+from pathlib import Path
 from email_notifier import PipelineEmailNotifier
 
+@lru_cache(maxsize=4)
+def _load_json(path, mtime):
+    """Parse a JSON file, cached by (path, mtime) so unchanged files are read once."""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def _write_json_atomic(path, data):
+    """Write JSON to a sibling temp file and atomically rename it into place."""
+    tmp_path = Path(f"{path}.tmp")
+    tmp_path.write_text(json.dumps(data, separators=(',', ':')))
+    os.replace(tmp_path, path)
+
 def main():
     """Interactive email setup for pipeline notifications."""
     print("📧 OHLCV Pipeline Email Notification Setup")
@@ -26,20 +40,19 @@ def main():
     
     if os.path.exists(stock_monitor_config):
         try:
-            with open(stock_monitor_config, 'r') as f:
-                stock_config = json.load(f)
-                if 'email' in stock_config and stock_config['email']['sender_email'] != 'your_email@gmail.com':
-                    print(f"🔍 Found existing email configuration in stock-monitor project:")
-                    print(f"   📧 Sender: {stock_config['email']['sender_email']}")
-                    print(f"   📬 Recipient: {stock_config['email']['recipient_email']}")
-                    print(f"   🌐 SMTP: {stock_config['email']['smtp_server']}:{stock_config['email']['smtp_port']}")
-                    print()
-                    
-                    use_existing_input = input("Use existing email configuration? (Y/n): ").strip().lower()
-                    if use_existing_input in ['', 'y', 'yes']:
-                        use_existing = True
-                        email_config = stock_config['email']
-                        print("✅ Using existing email configuration from stock-monitor")
+            stock_config = _load_json(stock_monitor_config, os.path.getmtime(stock_monitor_config))
+            if 'email' in stock_config and stock_config['email']['sender_email'] != 'your_email@gmail.com':
+                print(f"🔍 Found existing email configuration in stock-monitor project:")
+                print(f"   📧 Sender: {stock_config['email']['sender_email']}")
+                print(f"   📬 Recipient: {stock_config['email']['recipient_email']}")
+                print(f"   🌐 SMTP: {stock_config['email']['smtp_server']}:{stock_config['email']['smtp_port']}")
+                print()
+                
+                use_existing_input = input("Use existing email configuration? (Y/n): ").strip().lower()
+                if use_existing_input in ['', 'y', 'yes']:
+                    use_existing = True
+                    email_config = stock_config['email']
+                    print("✅ Using existing email configuration from stock-monitor")
         except Exception as e:
             print(f"⚠️  Could not read stock-monitor config: {e}")
     
@@ -112,8 +125,7 @@ def main():
     
     # Create temporary config file for testing
     temp_config_file = 'temp_email_config.json'
-    with open(temp_config_file, 'w') as f:
-        json.dump(email_config, f, indent=4)
+    _write_json_atomic(temp_config_file, email_config)
     
     try:
         # Test the email configuration
@@ -5,10 +5,28 @@ Simple Email Test - Minimal test to identify and fix encoding issues
 
 import smtplib
 import os
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import re
+import string
+from email.message import EmailMessage
 from datetime import datetime
 
+# Matches the first non-ASCII character in a configuration value
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+
+# HTML body compiled once; ASCII-only so it can be sent as 7bit without QP/base64
+_TMPL = string.Template("""
+        <html>
+        <body>
+        <h2>Email Test Successful</h2>
+        <p>This is a test email from your OHLCV Pipeline.</p>
+        <p>Configuration: Working</p>
+        <p>Recipient: $rcpt</p>
+        <p>Time: $ts</p>
+        <p>Your email notifications are ready!</p>
+        </body>
+        </html>
+        """)
+
 def simple_email_test():
     """Simple email test with minimal content."""
     
@@ -32,28 +50,18 @@ def simple_email_test():
         return False
     
     try:
-        # Create message with minimal content
-        msg = MIMEMultipart()
+        # Create single-part message with minimal content
+        msg = EmailMessage()
         msg['From'] = sender_email
         msg['To'] = recipient_email
         msg['Subject'] = "OHLCV Pipeline Test Email"
         
         # Simple HTML body without special characters
-        body = """
-        <html>
-        <body>
-        <h2>Email Test Successful</h2>
-        <p>This is a test email from your OHLCV Pipeline.</p>
-        <p>Configuration: Working</p>
-        <p>Recipient: """ + recipient_email + """</p>
-        <p>Time: """ + datetime.now().strftime('%Y-%m-%d %H:%M:%S') + """</p>
-        <p>Your email notifications are ready!</p>
-        </body>
-        </html>
-        """
-        
-        # Attach the body
-        msg.attach(MIMEText(body, 'html', 'utf-8'))
+        body = _TMPL.substitute(
+            rcpt=recipient_email,
+            ts=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        )
+        msg.set_content(body, subtype='html', cte='7bit')
         
         # Send email
         print("Connecting to SMTP server...")
@@ -82,18 +90,18 @@ def simple_email_test():
             print("   • Checking for non-ASCII characters in configuration...")
             
             # Check for non-ASCII characters
-            for var_name, var_value in [
+            for var_name, var_value in (
                 ('SENDER_EMAIL', sender_email),
                 ('RECIPIENT_EMAIL', recipient_email),
                 ('SMTP_SERVER', smtp_server)
-            ]:
+            ):
                 if var_value:
-                    try:
-                        var_value.encode('ascii')
-                        print(f"   • {var_name}: OK (ASCII)")
-                    except UnicodeEncodeError as ue:
-                        print(f"   • {var_name}: ❌ Contains non-ASCII character at position {ue.start}")
+                    match = _NON_ASCII.search(var_value)
+                    if match:
+                        print(f"   • {var_name}: ❌ Contains non-ASCII character at position {match.start()}")
                         print(f"     Value: {repr(var_value)}")
+                    else:
+                        print(f"   • {var_name}: OK (ASCII)")
         
         return False
 
@@ -6,33 +6,47 @@ Simple test script to validate basic functionality.
 import json
 import sys
 import os
+from functools import lru_cache
+
+from polygon_client import SESSION as _SESSION
+
+@lru_cache(maxsize=1)
+def _from_config():
+    """Read config.json once and cache the parsed dict."""
+    if not os.path.exists('config.json'):
+        return {}
+    with open('config.json', 'r') as f:
+        return json.load(f)
+
+def _get_api_key():
+    """Get the Polygon.io API key from the environment, falling back to config.json."""
+    return os.getenv('POLYGON_API_KEY') or _from_config().get('polygon_api_key')
 
 def test_config():
-    """Test environment variable configuration."""
-    print("Testing environment variables...")
+    """Test Polygon.io API key configuration (environment or config.json)."""
+    print("Testing API key configuration...")
     try:
-        api_key = os.getenv('POLYGON_API_KEY')
+        api_key = _get_api_key()
         
         if api_key:
-            print("  ✓ POLYGON_API_KEY environment variable is set")
+            print("  ✓ Polygon.io API key is set")
             return True
         else:
-            print("  ✗ POLYGON_API_KEY environment variable not set")
+            print("  ✗ Polygon.io API key not found in POLYGON_API_KEY or config.json")
             print("  Please set it with: export POLYGON_API_KEY=your_api_key_here")
+            print("  or add \"polygon_api_key\" to config.json")
             return False
     except Exception as e:
-        print(f"  ✗ Environment variable error: {e}")
+        print(f"  ✗ Configuration error: {e}")
         return False
 
 def test_polygon_api():
     """Test Polygon.io API."""
     print("Testing Polygon.io API...")
     try:
-        import requests
-        
-        api_key = os.getenv('POLYGON_API_KEY')
+        api_key = _get_api_key()
         if not api_key:
-            print("  ✗ POLYGON_API_KEY environment variable not set")
+            print("  ✗ Polygon.io API key not found in POLYGON_API_KEY or config.json")
             return False
         
         # Test with a simple ticker
@@ -42,7 +56,7 @@ def test_polygon_api():
             'adjusted': 'true'
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = _SESSION.get(url, params=params, timeout=10)
         response.raise_for_status()
         
         data = response.json()
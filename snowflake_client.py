@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Shared Snowflake Connection
+Provides one process-wide Snowflake connection so test scripts run in the same process
+share a single TLS + PAT authentication handshake, plus the buffered section output
+helpers those scripts print with.
+"""
+
+import atexit
+import io
+import sys
+from functools import lru_cache, partial
+
+import snowflake.connector
+
+CONNECTION_NAME = 'DEMO_PRAJAGOPAL'
+
+# Result download tuning: more parallel chunk downloads and larger (fewer) result chunks
+CLIENT_PREFETCH_THREADS = 8
+CLIENT_RESULT_CHUNK_SIZE = 160  # MB, the Snowflake maximum
+
+
+@lru_cache(maxsize=1)
+def _connect() -> snowflake.connector.SnowflakeConnection:
+    """Open the shared connection; it is closed when the interpreter exits."""
+    conn = snowflake.connector.connect(
+        connection_name=CONNECTION_NAME,
+        client_prefetch_threads=CLIENT_PREFETCH_THREADS,
+        session_parameters={'CLIENT_RESULT_CHUNK_SIZE': CLIENT_RESULT_CHUNK_SIZE}
+    )
+    atexit.register(conn.close)
+    return conn
+
+
+def get_conn() -> snowflake.connector.SnowflakeConnection:
+    """Return the process-wide connection, reconnecting if it has been closed."""
+    conn = _connect()
+    if conn.is_closed():
+        _connect.cache_clear()
+        conn = _connect()
+    return conn
+
+
+def buffered_output():
+    """Return (buffer, emit) where emit prints into the buffer until flush_output writes it."""
+    out = io.StringIO()
+    return out, partial(print, file=out)
+
+
+def flush_output(out: io.StringIO) -> None:
+    """Write a section's buffered output to stdout in one call."""
+    sys.stdout.write(out.getvalue())
+    sys.stdout.flush()
+    out.seek(0)
+    out.truncate()
@@ -7,6 +7,32 @@ Tests the email notification system without actually sending emails.
 import json
 import sys
 from datetime import datetime
+from email.mime.text import MIMEText
+
+from email_notifier import PipelineEmailNotifier, SMTPPool
+
+class MockSMTP:
+    """Mock SMTP connection that records sends instead of talking to a server."""
+    
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.sent = 0
+    
+    def starttls(self):
+        pass
+    
+    def login(self, user, password):
+        pass
+    
+    def noop(self):
+        return (250, b'OK')
+    
+    def send_message(self, msg):
+        self.sent += 1
+    
+    def quit(self):
+        pass
 
 class MockEmailNotifier:
     """Mock email notifier for testing purposes."""
@@ -19,6 +45,14 @@ class MockEmailNotifier:
             "sender_password": "mock_password",
             "recipient_email": "recipient@example.com"
         }
+        self.pool = SMTPPool(
+            size=1,
+            host=self.config['smtp_server'],
+            port=self.config['smtp_port'],
+            user=self.config['sender_email'],
+            pw=self.config['sender_password'],
+            smtp_factory=MockSMTP
+        )
     
     def send_success_notification(self, execution_stats):
         """Mock success notification - just print what would be sent."""
@@ -96,6 +130,18 @@ def test_success_scenario():
     }
     
     success = notifier.send_success_notification(mock_stats)
+    
+    # Fan out one message per ticker and verify the pooled connection is reused
+    for i in range(mock_stats['total_tickers']):
+        msg = MIMEText(f"Ticker {i + 1} loaded", 'plain', 'utf-8')
+        msg['From'] = notifier.config['sender_email']
+        msg['To'] = notifier.config['recipient_email']
+        msg['Subject'] = f"OHLCV ticker {i + 1}"
+        notifier.pool.send(msg)
+    
+    print(f"🔌 SMTP connections opened for {mock_stats['total_tickers']} messages: {notifier.pool.connect_count}")
+    assert notifier.pool.connect_count == 1, "SMTP pool did not reuse its connection"
+    
     print(f"\n🎯 Success Notification Test: {'✅ PASSED' if success else '❌ FAILED'}")
     return success
 
@@ -128,6 +174,37 @@ def test_email_connection():
     print(f"\n🎯 Connection Test: {'✅ PASSED' if success else '❌ FAILED'}")
     return success
 
+def test_notifier_pooling():
+    """Test that the real notifier sends through its pool and survives a partial config."""
+    print("\n🧪 TESTING NOTIFIER SMTP POOL")
+    print("=" * 60)
+    
+    servers = []
+    
+    def smtp_factory(host, port):
+        servers.append(MockSMTP(host, port))
+        return servers[-1]
+    
+    notifier = PipelineEmailNotifier(smtp_factory=smtp_factory)
+    notifier.config = MockEmailNotifier().config
+    
+    sent_success = notifier.send_success_notification({"total_tickers": 1, "successful_tickers": 1})
+    sent_failure = notifier.send_failure_notification({"exit_code": 1})
+    sent = sum(server.sent for server in servers)
+    print(f"🔌 SMTP connections opened: {notifier.pool.connect_count}, messages sent: {sent}")
+    pooled = sent_success and sent_failure and notifier.pool.connect_count == 1 and sent == 2
+    notifier.close()
+    
+    # A config missing SMTP keys fails the send instead of raising
+    partial = PipelineEmailNotifier(smtp_factory=smtp_factory)
+    partial.config = {"sender_email": "test@example.com", "recipient_email": "recipient@example.com"}
+    handled = partial.send_failure_notification({"exit_code": 1}) is False
+    print(f"• Partial config handled: {'✅ YES' if handled else '❌ NO'}")
+    
+    success = pooled and handled
+    print(f"\n🎯 Notifier Pool Test: {'✅ PASSED' if success else '❌ FAILED'}")
+    return success
+
 def test_scheduler_integration():
     """Test integration with scheduler script."""
     print("\n🧪 TESTING SCHEDULER INTEGRATION")
@@ -174,6 +251,7 @@ def main():
         ("Email Connection", test_email_connection),
         ("Success Notification", test_success_scenario),
         ("Failure Notification", test_failure_scenario),
+        ("Notifier SMTP Pool", test_notifier_pooling),
         ("Scheduler Integration", test_scheduler_integration)
     ]
     
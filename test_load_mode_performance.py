@@ -7,24 +7,197 @@ Tests COPY INTO command performance comparing three scenarios:
 3. LOAD_MODE = FULL_INGEST with USE_VECTORIZED_SCANNER = FALSE
 """
 
+import argparse
+import atexit
+import json
+import math
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 import snowflake.connector
+from snowflake.connector.errors import NotSupportedError
 import logging
+import logging.handlers
+import queue
+import random
+import statistics
+import threading
 import time
 import sys
-from datetime import datetime
-from typing import Dict, Any
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Any, Final, Tuple
+
+# Configure logging: records are queued and written by a background listener
+# thread so file/console I/O stays out of the timed COPY sections
+_log_queue = queue.Queue(-1)
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+_log_file_handler = logging.FileHandler('load_mode_performance_test.log')
+_log_file_handler.setFormatter(_log_formatter)
+_log_stream_handler = logging.StreamHandler(sys.stdout)
+_log_stream_handler.setFormatter(_log_formatter)
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_file_handler, _log_stream_handler)
+_log_listener.start()
+_log_listener_running = True
+
+
+def _stop_log_listener():
+    """Flush queued log records and stop the listener thread (safe to call twice)."""
+    global _log_listener_running
+    if _log_listener_running:
+        _log_listener.stop()
+        _log_listener_running = False
+
+
+atexit.register(_stop_log_listener)
+
+# The queue handler only passes the message through; the listener's handlers format it
+_log_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_log_queue_handler.setFormatter(logging.Formatter('%(message)s'))
 
-# Configure logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('load_mode_performance_test.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
+    handlers=[_log_queue_handler]
 )
 logger = logging.getLogger(__name__)
 
+# Upper bound for any single statement so a stuck COPY cannot hang the benchmark
+STATEMENT_TIMEOUT_SECONDS = 3600
+
+# Single COPY INTO template shared by every scenario; LOAD_MODE, the scanner
+# setting, the target table and an optional FILES=(...) clause are filled per call
+_COPY_TEMPLATE = """
+        COPY INTO {target}
+          FROM @{stage}
+          {files_clause}
+          FILE_FORMAT = (
+             FORMAT_NAME = '{file_format}'
+             USE_VECTORIZED_SCANNER = {vectorized}
+          )
+          LOAD_MODE = {mode}
+          PURGE = FALSE
+          MATCH_BY_COLUMN_NAME = CASE_SENSITIVE
+          FORCE = FALSE;
+        """
+
+# Scenario label -> (LOAD_MODE, USE_VECTORIZED_SCANNER)
+SCENARIOS = {
+    'FULL_INGEST (VECTORIZED=TRUE)': ('FULL_INGEST', 'TRUE'),
+    'ADD_FILES_COPY (VECTORIZED=TRUE)': ('ADD_FILES_COPY', 'TRUE'),
+    'FULL_INGEST (VECTORIZED=FALSE)': ('FULL_INGEST', 'FALSE')
+}
+
+# Source table, stage and file format the scenarios load from
+SOURCE_TABLE: Final = 'sp500_top10_sector_ohlcv_itbl'
+STAGE: Final = 'SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG'
+FILE_FORMAT: Final = 'SP500_TOP10_SECTOR_OHLCV_FILE_FORMAT'
+
+# Per-scenario target tables so the COPY runs can execute concurrently
+SCENARIO_TABLES: Final = {
+    'FULL_INGEST (VECTORIZED=TRUE)': 'sp500_top10_sector_ohlcv_itbl_perf_fi_vec',
+    'ADD_FILES_COPY (VECTORIZED=TRUE)': 'sp500_top10_sector_ohlcv_itbl_perf_afc_vec',
+    'FULL_INGEST (VECTORIZED=FALSE)': 'sp500_top10_sector_ohlcv_itbl_perf_fi_novec'
+}
+
+
+def _build_copy_command(load_mode: str, target_table: str, files_clause: str = '') -> str:
+    """Render the COPY INTO statement for a scenario."""
+    mode, vectorized = SCENARIOS[load_mode]
+    return _COPY_TEMPLATE.format(
+        target=target_table,
+        stage=STAGE,
+        files_clause=files_clause,
+        file_format=FILE_FORMAT,
+        vectorized=vectorized,
+        mode=mode
+    )
+
+
+# Each scenario's full-stage COPY, rendered once so every run sends the same SQL text
+COPY_COMMANDS: Final[Dict[str, str]] = {
+    load_mode: _build_copy_command(load_mode, table) for load_mode, table in SCENARIO_TABLES.items()
+}
+
+# Pre-split COPY command lines for logging
+COPY_COMMAND_LINES: Final[Dict[str, Tuple[str, ...]]] = {
+    load_mode: tuple(line.strip() for line in sql.strip().splitlines() if line.strip())
+    for load_mode, sql in COPY_COMMANDS.items()
+}
+
+@dataclass(frozen=True)
+class ComparisonResult:
+    """Outcome of comparing the scenarios; per-scenario values are keyed by scenario label."""
+    fastest_scenario: str
+    fastest_time: float
+    times: Dict[str, float]
+    throughputs: Dict[str, float]
+    rows: Dict[str, int]
+    improvement_vs_fastest: Dict[str, float]
+    vectorized_scanner_improvement: float
+
+
+# Warehouse sizes accepted by --wh-size
+WAREHOUSE_SIZES = ('XSMALL', 'SMALL', 'MEDIUM', 'LARGE', 'XLARGE', 'XXLARGE', 'XXXLARGE', 'X4LARGE')
+
+# SHOW WAREHOUSES reports sizes as e.g. '2X-Large'; map them to the --wh-size names
+_SHOWN_WAREHOUSE_SIZES = {
+    'X-SMALL': 'XSMALL',
+    'SMALL': 'SMALL',
+    'MEDIUM': 'MEDIUM',
+    'LARGE': 'LARGE',
+    'X-LARGE': 'XLARGE',
+    '2X-LARGE': 'XXLARGE',
+    '3X-LARGE': 'XXXLARGE',
+    '4X-LARGE': 'X4LARGE',
+    '5X-LARGE': 'X5LARGE',
+    '6X-LARGE': 'X6LARGE'
+}
+
+# Snowflake accepts at most 1000 explicit file names per COPY INTO ... FILES=(...)
+MAX_FILES_PER_COPY = 1000
+
+# Connection options shared by every session the test opens: prefetch result chunks
+# in parallel, request Arrow results and tag queries so they are easy to find in history
+_CONNECT_KWARGS = {
+    'connection_name': 'DEMO_PRAJAGOPAL',
+    'client_prefetch_threads': 4,
+    'session_parameters': {
+        'PYTHON_CONNECTOR_QUERY_RESULT_FORMAT': 'ARROW',
+        'QUERY_TAG': 'load_mode_perf_test'
+    }
+}
+
+# Connection shared across runs in the same process (e.g. repeated main() calls)
+_CACHED_CONN = None
+_CACHED_CONN_LOCK = threading.Lock()
+
+
+def _get_cached_connection() -> snowflake.connector.SnowflakeConnection:
+    """Return the shared keep-alive Snowflake connection, creating it if needed."""
+    global _CACHED_CONN
+    with _CACHED_CONN_LOCK:
+        if _CACHED_CONN is None or _CACHED_CONN.is_closed():
+            _CACHED_CONN = snowflake.connector.connect(
+                **_CONNECT_KWARGS,
+                client_session_keep_alive=True,
+                client_session_keep_alive_heartbeat_frequency=900
+            )
+        return _CACHED_CONN
+
+
+def _close_cached_conn():
+    """Close the shared Snowflake connection at interpreter shutdown."""
+    global _CACHED_CONN
+    with _CACHED_CONN_LOCK:
+        if _CACHED_CONN is not None and not _CACHED_CONN.is_closed():
+            _CACHED_CONN.close()
+        _CACHED_CONN = None
+
+
+atexit.register(_close_cached_conn)
+
 
 class LoadModePerformanceTest:
     """
@@ -34,229 +207,615 @@ class LoadModePerformanceTest:
     3. LOAD_MODE = FULL_INGEST with USE_VECTORIZED_SCANNER = FALSE
     """
     
-    def __init__(self):
+    def __init__(self, parallel: bool = True, parallelism: int = 8, cold_start: bool = False,
+                 wh_size: str = None, iterations: int = 1, shuffle: bool = False):
         """Initialize the test."""
         self.conn = None
         self.cursor = None
+        self.parallel = parallel
+        self.parallelism = parallelism
+        self.cold_start = cold_start
+        self.wh_size = wh_size
+        self.iterations = iterations
+        self.shuffle = shuffle
+        self.stage_files = []
         
-        # COPY INTO command for LOAD_MODE = FULL_INGEST with VECTORIZED_SCANNER = TRUE
-        self.copy_command_full_ingest_vectorized = """
-        COPY INTO sp500_top10_sector_ohlcv_itbl
-          FROM @SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG
-          FILE_FORMAT = (
-             FORMAT_NAME = 'SP500_TOP10_SECTOR_OHLCV_FILE_FORMAT'
-             USE_VECTORIZED_SCANNER = TRUE
-          )
-          LOAD_MODE = FULL_INGEST
-          PURGE = FALSE
-          MATCH_BY_COLUMN_NAME = CASE_SENSITIVE
-          FORCE = FALSE;
-        """
+        self.source_table = SOURCE_TABLE
+        self.stage = STAGE
+        self.scenario_tables = SCENARIO_TABLES
         
-        # COPY INTO command for LOAD_MODE = FULL_INGEST with VECTORIZED_SCANNER = FALSE
-        self.copy_command_full_ingest_non_vectorized = """
-        COPY INTO sp500_top10_sector_ohlcv_itbl
-          FROM @SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG
-          FILE_FORMAT = (
-             FORMAT_NAME = 'SP500_TOP10_SECTOR_OHLCV_FILE_FORMAT'
-             USE_VECTORIZED_SCANNER = FALSE
-          )
-          LOAD_MODE = FULL_INGEST
-          PURGE = FALSE
-          MATCH_BY_COLUMN_NAME = CASE_SENSITIVE
-          FORCE = FALSE;
-        """
-        
-        # COPY INTO command for LOAD_MODE = ADD_FILES_COPY
-        self.copy_command_add_files_copy = """
-        COPY INTO sp500_top10_sector_ohlcv_itbl
-          FROM @SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG
-          FILE_FORMAT = (
-             FORMAT_NAME = 'SP500_TOP10_SECTOR_OHLCV_FILE_FORMAT'
-             USE_VECTORIZED_SCANNER = TRUE
-          )
-          LOAD_MODE = ADD_FILES_COPY
-          PURGE = FALSE
-          MATCH_BY_COLUMN_NAME = CASE_SENSITIVE
-          FORCE = FALSE;
-        """
+        # Idle per-scenario connections, reused across iterations and batch sizes
+        self._conn_pool = queue.Queue()
         
         logger.info("Load Mode Performance Test initialized")
     
     def _connect_to_snowflake(self) -> bool:
         """Establish connection to Snowflake."""
         try:
-            self.conn = snowflake.connector.connect(
-                connection_name='DEMO_PRAJAGOPAL'
-            )
+            self.conn = _get_cached_connection()
             self.cursor = self.conn.cursor()
+            self.cursor.arraysize = 1000
             logger.info("Successfully connected to Snowflake")
             return True
         except Exception as e:
             logger.error(f"Failed to connect to Snowflake: {e}")
             return False
     
-    def _disconnect_from_snowflake(self):
-        """Close Snowflake connection."""
+    def _acquire_connection(self) -> snowflake.connector.SnowflakeConnection:
+        """Take an idle connection from the pool, or open a new one if none is free."""
+        while True:
+            try:
+                conn = self._conn_pool.get_nowait()
+            except queue.Empty:
+                return snowflake.connector.connect(**_CONNECT_KWARGS)
+            if not conn.is_closed():
+                return conn
+    
+    def _release_connection(self, conn: snowflake.connector.SnowflakeConnection):
+        """Return a connection to the pool for the next scenario run."""
+        self._conn_pool.put(conn)
+    
+    def _drain_connection_pool(self):
+        """Close every idle pooled connection."""
+        while True:
+            try:
+                conn = self._conn_pool.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                conn.close()
+            except Exception as e:
+                logger.warning(f"Error closing pooled connection: {e}")
+    
+    def _disconnect_from_snowflake(self, close: bool = False):
+        """Release the cursor and pooled connections; the shared connection is only closed when close=True."""
         try:
             if self.cursor:
                 self.cursor.close()
-            if self.conn:
-                self.conn.close()
-            logger.info("Snowflake connection closed")
+                self.cursor = None
+            self._drain_connection_pool()
+            if close:
+                _close_cached_conn()
+                logger.info("Snowflake connection closed")
         except Exception as e:
             logger.error(f"Error closing Snowflake connection: {e}")
     
-    def _get_table_row_count(self) -> int:
-        """Get current row count in the target table."""
+    def _warm_warehouse(self, cursor=None, cold: bool = False):
+        """Resume the current warehouse and run trivial queries so COPY timings exclude resume time.
+        
+        With cold=True the warehouse is suspended first, dropping its local cache so
+        every scenario starts from the same cold state.
+        """
+        cursor = cursor or self.cursor
         try:
-            self.cursor.execute("SELECT COUNT(*) FROM sp500_top10_sector_ohlcv_itbl")
-            result = self.cursor.fetchone()
-            count = result[0] if result else 0
-            logger.info(f"Current table row count: {count:,}")
-            return count
+            cursor.execute("SELECT CURRENT_WAREHOUSE()")
+            warehouse = cursor.fetchone()[0]
+            if warehouse:
+                if cold:
+                    try:
+                        cursor.execute(f"ALTER WAREHOUSE {warehouse} SUSPEND")
+                        logger.info(f"Suspended warehouse {warehouse} for a cold start")
+                    except snowflake.connector.errors.ProgrammingError as e:
+                        logger.warning(f"Could not suspend warehouse {warehouse}: {e}")
+                try:
+                    cursor.execute(f"ALTER WAREHOUSE IF EXISTS {warehouse} RESUME IF SUSPENDED")
+                except snowflake.connector.errors.ProgrammingError as e:
+                    logger.warning(f"Could not resume warehouse {warehouse}: {e}")
+            
+            cursor.execute(f"ALTER SESSION SET STATEMENT_TIMEOUT_IN_SECONDS = {STATEMENT_TIMEOUT_SECONDS}")
+            cursor.execute("SELECT SYSTEM$WAIT(1)")
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
         except Exception as e:
-            logger.error(f"Failed to get table row count: {e}")
-            return -1
+            logger.warning(f"Warehouse warm-up failed: {e}")
+    
+    def _describe_warehouse(self) -> Dict[str, Any]:
+        """Log the current warehouse's name, size and cluster count for reproducibility."""
+        try:
+            self.cursor.execute("SELECT CURRENT_WAREHOUSE()")
+            warehouse = self.cursor.fetchone()[0]
+            if not warehouse:
+                logger.warning("No current warehouse set for this session")
+                return {}
+            
+            self.cursor.execute(f"SHOW WAREHOUSES LIKE '{warehouse}'")
+            row = self.cursor.fetchone()
+            columns = [column[0] for column in self.cursor.description]
+            details = dict(zip(columns, row)) if row else {}
+            info = {
+                'name': warehouse,
+                'size': details.get('size'),
+                'cluster_count': details.get('started_clusters')
+            }
+            logger.info(f"Warehouse: {info['name']} (size: {info['size']}, clusters: {info['cluster_count']})")
+            return info
+        except Exception as e:
+            logger.warning(f"Could not describe warehouse: {e}")
+            return {}
+    
+    def _resize_warehouse(self, warehouse: str, size: str) -> bool:
+        """Set the warehouse size and wait for the resize to finish."""
+        try:
+            self.cursor.execute(f"ALTER WAREHOUSE {warehouse} SET WAREHOUSE_SIZE = '{size}' WAIT_FOR_COMPLETION = TRUE")
+            logger.info(f"Warehouse {warehouse} resized to {size}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to resize warehouse {warehouse} to {size}: {e}")
+            return False
     
     def _get_stage_file_count(self) -> int:
         """Get count of files in the stage."""
         try:
-            self.cursor.execute("LIST @SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG")
-            results = self.cursor.fetchall()
-            file_count = len(results)
+            try:
+                # Count server-side from the stage's directory table
+                self.cursor.execute(f"SELECT COUNT(*) FROM DIRECTORY(@{self.stage})")
+                file_count = self.cursor.fetchone()[0]
+                sample_files = []
+                if logger.isEnabledFor(logging.INFO):
+                    self.cursor.execute(
+                        f"SELECT RELATIVE_PATH FROM DIRECTORY(@{self.stage}) ORDER BY RELATIVE_PATH LIMIT 5"
+                    )
+                    sample_files = [row[0] for row in self.cursor.fetchall()]
+            except snowflake.connector.errors.ProgrammingError:
+                # No directory table on the stage: LIST, keep 5 rows and count the rest server-side
+                self.cursor.execute(f"LIST @{self.stage}")
+                list_query_id = self.cursor.sfqid
+                sample_files = [row[0] for row in self.cursor.fetchmany(5)]
+                
+                # Abandon the remaining result chunks instead of downloading them
+                self.cursor.close()
+                self.cursor = self.conn.cursor()
+                self.cursor.arraysize = 1000
+                self.cursor.execute(f"SELECT COUNT(*) FROM TABLE(RESULT_SCAN('{list_query_id}'))")
+                file_count = self.cursor.fetchone()[0]
+            
             logger.info(f"Files in stage: {file_count}")
             
             # Show sample files
-            if results:
+            if sample_files:
                 logger.info("Sample files in stage:")
-                for i, row in enumerate(results[:5]):
-                    logger.info(f"  {i+1}. {row[0]}")
-                if len(results) > 5:
-                    logger.info(f"  ... and {len(results) - 5} more files")
+                for i, name in enumerate(sample_files):
+                    logger.info(f"  {i+1}. {name}")
+                if file_count > len(sample_files):
+                    logger.info(f"  ... and {file_count - len(sample_files)} more files")
             
             return file_count
         except Exception as e:
             logger.error(f"Failed to list stage files: {e}")
             return -1
     
-    def _truncate_table(self) -> bool:
-        """Truncate the target table to prepare for fresh load."""
+    def _list_stage_files(self) -> list:
+        """List file names in the stage relative to the stage root."""
+        try:
+            self.cursor.execute(f"SELECT RELATIVE_PATH FROM DIRECTORY(@{self.stage}) ORDER BY RELATIVE_PATH")
+        except snowflake.connector.errors.ProgrammingError:
+            self.cursor.execute(f"LIST @{self.stage}")
+            list_query_id = self.cursor.sfqid
+            self.cursor.execute(
+                f"SELECT SPLIT_PART(\"name\", '/', -1) FROM TABLE(RESULT_SCAN('{list_query_id}')) ORDER BY 1"
+            )
+        return [row[0] for row in self.cursor.fetchall()]
+    
+    def _files_clauses(self, chunk_size: int = None) -> list:
+        """Split the stage file list into FILES=(...) clauses, one per concurrent COPY.
+        
+        By default the files are spread over ``parallelism`` chunks; ``chunk_size``
+        instead fixes the number of files per COPY statement.
+        """
+        if not self.stage_files or (chunk_size is None and self.parallelism <= 1):
+            return ['']
+        
+        if chunk_size is not None:
+            n_chunks = math.ceil(len(self.stage_files) / min(chunk_size, MAX_FILES_PER_COPY))
+        else:
+            n_chunks = max(min(self.parallelism, len(self.stage_files)),
+                           math.ceil(len(self.stage_files) / MAX_FILES_PER_COPY))
+        clauses = []
+        for chunk in np.array_split(np.array(self.stage_files), n_chunks):
+            quoted = ', '.join(f"'{name}'" for name in chunk)
+            clauses.append(f"FILES = ({quoted})")
+        return clauses
+    
+    def _create_scenario_tables(self) -> bool:
+        """Create one empty transient target table per scenario with the source table's schema.
+        
+        Creating a fresh table is a metadata-only operation, unlike TRUNCATE, and
+        gives every scenario an empty table with no load history.
+        """
         try:
-            logger.info("Truncating target table...")
-            self.cursor.execute("TRUNCATE TABLE sp500_top10_sector_ohlcv_itbl")
-            logger.info("Table truncated successfully")
+            for table in self.scenario_tables.values():
+                self.cursor.execute(f"CREATE OR REPLACE TRANSIENT TABLE {table} LIKE {self.source_table}")
+            logger.info(f"Created {len(self.scenario_tables)} scenario target tables")
             return True
         except Exception as e:
-            logger.error(f"Failed to truncate table: {e}")
+            logger.error(f"Failed to create scenario tables: {e}")
             return False
     
-    def _get_table_statistics(self) -> Dict[str, Any]:
+    def _drop_scenario_tables(self):
+        """Drop the per-scenario target tables."""
+        for table in self.scenario_tables.values():
+            try:
+                self.cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            except Exception as e:
+                logger.error(f"Failed to drop table {table}: {e}")
+    
+    def _get_table_statistics(self, cursor=None, table: str = None) -> Dict[str, Any]:
         """Get detailed table statistics after load."""
+        cursor = cursor or self.cursor
+        table = table or self.source_table
         try:
             stats = {}
             
-            # Row count
-            self.cursor.execute("SELECT COUNT(*) FROM sp500_top10_sector_ohlcv_itbl")
-            stats['total_rows'] = self.cursor.fetchone()[0]
-            
-            # Unique tickers
-            self.cursor.execute("SELECT COUNT(DISTINCT TICKER) FROM sp500_top10_sector_ohlcv_itbl")
-            stats['unique_tickers'] = self.cursor.fetchone()[0]
-            
-            # Date range
-            self.cursor.execute("SELECT MIN(OHLC_DATE), MAX(OHLC_DATE) FROM sp500_top10_sector_ohlcv_itbl")
-            date_range = self.cursor.fetchone()
-            stats['min_date'] = date_range[0]
-            stats['max_date'] = date_range[1]
-            
-            # Sample ticker counts
-            self.cursor.execute("""
-                SELECT TICKER, COUNT(*) as row_count 
-                FROM sp500_top10_sector_ohlcv_itbl 
-                GROUP BY TICKER 
-                ORDER BY TICKER 
-                LIMIT 5
+            # Row count, unique tickers, date range and sample ticker counts in one round-trip
+            cursor.execute(f"""
+                SELECT COUNT(*), COUNT(DISTINCT TICKER), MIN(OHLC_DATE), MAX(OHLC_DATE),
+                       (SELECT ARRAY_AGG(OBJECT_CONSTRUCT('t', TICKER, 'c', C)) WITHIN GROUP (ORDER BY TICKER)
+                        FROM (SELECT TICKER, COUNT(*) AS C
+                              FROM {table}
+                              GROUP BY TICKER
+                              ORDER BY TICKER
+                              LIMIT 5))
+                FROM {table}
             """)
-            stats['sample_ticker_counts'] = self.cursor.fetchall()
+            total_rows, unique_tickers, min_date, max_date, sample = cursor.fetchone()
+            stats['total_rows'] = total_rows
+            stats['unique_tickers'] = unique_tickers
+            stats['min_date'] = min_date
+            stats['max_date'] = max_date
+            
+            # ARRAY/OBJECT values are returned as JSON text
+            stats['sample_ticker_counts'] = [
+                (item['t'], item['c']) for item in json.loads(sample or '[]')
+            ]
             
             return stats
         except Exception as e:
-            logger.error(f"Failed to get table statistics: {e}")
+            logger.error("Failed to get table statistics: %s", e)
             return {}
     
-    def _execute_copy_command(self, load_mode: str, copy_command: str) -> Dict[str, Any]:
-        """Execute COPY INTO command and measure performance."""
+    @staticmethod
+    def _fetch_copy_results(cursor) -> pa.Table:
+        """Fetch COPY status rows as an Arrow table with lower-case column names."""
+        try:
+            table = cursor.fetch_arrow_all()
+        except NotSupportedError:
+            # COPY status may come back in JSON result format; build the table from tuples
+            rows = cursor.fetchall()
+            names = [column[0] for column in cursor.description]
+            table = pa.table({name: [row[i] for row in rows] for i, name in enumerate(names)})
+        if table is None:
+            return pa.table({})
+        return table.rename_columns([name.lower() for name in table.column_names])
+    
+    def _summarize_copy_results(self, cursor, query_ids: list) -> Dict[str, Any]:
+        """Aggregate COPY status rows server-side via RESULT_SCAN.
+        
+        Only the file count and total rows loaded are transferred, instead of one
+        row per loaded file; the first 3 status rows are fetched for DEBUG logging.
+        """
+        scans = ' UNION ALL '.join(f"SELECT * FROM TABLE(RESULT_SCAN('{qid}'))" for qid in query_ids)
+        try:
+            cursor.execute(f'SELECT COUNT(*), SUM("rows_loaded") FROM ({scans})')
+            total_files, total_rows = cursor.fetchone()
+            sample = pa.table({})
+            if logger.isEnabledFor(logging.DEBUG):
+                cursor.execute(f"SELECT * FROM ({scans}) LIMIT 3")
+                sample = self._fetch_copy_results(cursor)
+        except snowflake.connector.errors.ProgrammingError:
+            # Status-only results (e.g. no files processed) have no rows_loaded column
+            tables = []
+            for qid in query_ids:
+                cursor.get_results_from_sfqid(qid)
+                tables.append(self._fetch_copy_results(cursor))
+            results = pa.concat_tables(tables, promote_options='default')
+            total_files = results.num_rows
+            total_rows = 0
+            if 'rows_loaded' in results.column_names:
+                total_rows = pc.sum(results['rows_loaded']).as_py()
+            sample = results.slice(0, 3)
+        
+        return {'files': total_files, 'rows_loaded': total_rows or 0, 'sample': sample}
+    
+    def _get_query_profile(self, cursor, query_ids: list) -> Dict[str, Any]:
+        """Fetch server-side timings for COPY query IDs from the session's query history.
+        
+        Times are in milliseconds. For sharded runs the compile/queue times and bytes
+        are summed, while execution time is the longest shard since shards overlap.
+        """
         try:
-            logger.info(f"Executing COPY INTO with LOAD_MODE = {load_mode}")
+            placeholders = ', '.join(['%s'] * len(query_ids))
+            cursor.execute(f"""
+                SELECT COMPILATION_TIME, QUEUED_PROVISIONING_TIME, EXECUTION_TIME,
+                       BYTES_SCANNED, ROWS_PRODUCED
+                FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY_BY_SESSION(RESULT_LIMIT => {len(query_ids) + 10}))
+                WHERE QUERY_ID IN ({placeholders})
+            """, tuple(query_ids))
+            rows = cursor.fetchall()
+            if not rows:
+                return {}
+            
+            return {
+                'query_ids': list(query_ids),
+                'compilation_time_ms': sum(row[0] or 0 for row in rows),
+                'queued_provisioning_time_ms': sum(row[1] or 0 for row in rows),
+                'execution_time_ms': max(row[2] or 0 for row in rows),
+                'bytes_scanned': sum(row[3] or 0 for row in rows),
+                'rows_produced': sum(row[4] or 0 for row in rows)
+            }
+        except Exception as e:
+            logger.warning(f"Could not read query profile for {query_ids}: {e}")
+            return {}
+    
+    def _build_result_info(self, load_mode: str, start_datetime: datetime, end_datetime: datetime,
+                           execution_time: float, copy_summary: Dict[str, Any], table_stats: Dict[str, Any],
+                           query_profile: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Assemble the result dictionary and performance metrics for a COPY run."""
+        # Parse results (COPY INTO returns status information)
+        result_info = {
+            'load_mode': load_mode,
+            'start_time': start_datetime,
+            'end_time': end_datetime,
+            'execution_time_seconds': execution_time,
+            'execution_time_formatted': f"{execution_time:.2f} seconds",
+            'copy_results': copy_summary['sample'],
+            'table_statistics': table_stats,
+            'query_profile': query_profile or {},
+            'success': True
+        }
+        
+        if query_profile:
+            logger.info("[%s] Server-side: compile %s ms, queued %s ms, execute %s ms, %s bytes scanned",
+                        load_mode, query_profile['compilation_time_ms'],
+                        query_profile['queued_provisioning_time_ms'],
+                        query_profile['execution_time_ms'],
+                        format(query_profile['bytes_scanned'], ','))
+        
+        # Calculate performance metrics
+        if copy_summary['files']:
+            total_files = copy_summary['files']
+            total_rows = copy_summary['rows_loaded']
+            throughput = total_rows / execution_time if execution_time > 0 else 0
+            
+            result_info.update({
+                'files_processed': total_files,
+                'rows_loaded': total_rows,
+                'throughput_rows_per_second': throughput,
+                'throughput_formatted': f"{throughput:,.0f} rows/sec"
+            })
+            
+            logger.info("[%s] COPY command completed in %.2f seconds", load_mode, execution_time)
+            logger.info("[%s] Files processed: %d", load_mode, total_files)
+            logger.info("[%s] Total rows loaded: %s", load_mode, format(total_rows, ','))
+            logger.info("[%s] Throughput: %s rows/second", load_mode, format(throughput, ',.0f'))
+            
+            # Log individual file results only when DEBUG output is wanted
+            if logger.isEnabledFor(logging.DEBUG):
+                for i, result in enumerate(copy_summary['sample'].to_pylist()):  # Show first 3 files
+                    logger.debug("[%s] File %d: %s", load_mode, i + 1, result)
+                if total_files > 3:
+                    logger.debug("[%s] ... and %d more files", load_mode, total_files - 3)
+        
+        return result_info
+    
+    def _execute_copy_command(self, load_mode: str, copy_command: str, target_table: str,
+                              command_lines: Tuple[str, ...], warm: bool = True,
+                              collect_stats: bool = True) -> Dict[str, Any]:
+        """Execute COPY INTO command and measure performance.
+        
+        Callers that warm the warehouse or collect table statistics themselves
+        (e.g. overlapped with another run) can turn those steps off.
+        """
+        try:
+            logger.info("Executing COPY INTO with LOAD_MODE = %s", load_mode)
             logger.info("COPY command:")
-            for line in copy_command.strip().split('\n'):
-                logger.info(f"  {line.strip()}")
+            for line in command_lines:
+                logger.info("  %s", line)
             
-            # Record start time
-            start_time = time.time()
+            if warm:
+                self._warm_warehouse()
+            
+            # Record start time (perf_counter_ns for the delta, datetime only for display)
             start_datetime = datetime.now()
+            t0 = time.perf_counter_ns()
             
             # Execute the COPY command
             self.cursor.execute(copy_command)
             
-            # Record end time
-            end_time = time.time()
-            end_datetime = datetime.now()
-            execution_time = end_time - start_time
+            # Record end time; the end timestamp is derived from the monotonic delta
+            t1 = time.perf_counter_ns()
+            execution_time = (t1 - t0) / 1e9
+            end_datetime = start_datetime + timedelta(seconds=execution_time)
+            query_id = self.cursor.sfqid
             
             # Get results
-            results = self.cursor.fetchall()
+            copy_summary = self._summarize_copy_results(self.cursor, [query_id])
+            
+            # Get server-side timings and detailed table statistics
+            query_profile = self._get_query_profile(self.cursor, [query_id])
+            table_stats = self._get_table_statistics(table=target_table) if collect_stats else {}
             
-            # Get detailed table statistics
-            table_stats = self._get_table_statistics()
+            return self._build_result_info(load_mode, start_datetime, end_datetime,
+                                           execution_time, copy_summary, table_stats, query_profile)
             
-            # Parse results (COPY INTO returns status information)
-            result_info = {
+        except Exception as e:
+            logger.error("Failed to execute COPY command with LOAD_MODE = %s: %s", load_mode, e)
+            return {
                 'load_mode': load_mode,
-                'start_time': start_datetime,
-                'end_time': end_datetime,
-                'execution_time_seconds': execution_time,
-                'execution_time_formatted': f"{execution_time:.2f} seconds",
-                'copy_results': results,
-                'table_statistics': table_stats,
-                'success': True
+                'execution_time_seconds': -1,
+                'error': str(e),
+                'success': False
             }
+    
+    def _execute_copy_async(self, load_mode: str, target_table: str,
+                            chunk_size: int = None) -> Dict[str, Any]:
+        """Run one COPY scenario on a pooled connection using async submission and polling.
+        
+        With parallelism > 1 the stage files are sharded into FILES=(...) chunks and
+        the chunked COPY statements run concurrently on the same session.
+        """
+        conn = None
+        healthy = False
+        try:
+            conn = self._acquire_connection()
+            cursor = conn.cursor()
             
-            # Calculate performance metrics
-            if results:
-                total_files = len(results)
-                total_rows = sum(row[2] for row in results if len(row) > 2)  # Sum rows_loaded
-                throughput = total_rows / execution_time if execution_time > 0 else 0
-                
-                result_info.update({
-                    'files_processed': total_files,
-                    'rows_loaded': total_rows,
-                    'throughput_rows_per_second': throughput,
-                    'throughput_formatted': f"{throughput:,.0f} rows/sec"
-                })
-                
-                logger.info(f"COPY command completed in {execution_time:.2f} seconds")
-                logger.info(f"Files processed: {total_files}")
-                logger.info(f"Total rows loaded: {total_rows:,}")
-                logger.info(f"Throughput: {throughput:,.0f} rows/second")
-                
-                # Log individual file results
-                for i, result in enumerate(results[:3]):  # Show first 3 files
-                    logger.info(f"File {i+1}: {result}")
-                if len(results) > 3:
-                    logger.info(f"... and {len(results) - 3} more files")
+            # Warm the warehouse so resume/compile latency is not charged to the COPY
+            self._warm_warehouse(cursor)
+            
+            sqls = [_build_copy_command(load_mode, target_table, clause)
+                    for clause in self._files_clauses(chunk_size)]
+            logger.info("Submitting %d COPY INTO %s statement(s) with LOAD_MODE = %s",
+                        len(sqls), target_table, load_mode)
+            
+            # Record start time (perf_counter_ns for the delta, datetime only for display)
+            start_datetime = datetime.now()
+            t0 = time.perf_counter_ns()
+            
+            query_ids = []
+            for sql in sqls:
+                cursor.execute_async(sql)
+                query_ids.append(cursor.sfqid)
+            
+            pending = list(query_ids)
+            while pending:
+                pending = [qid for qid in pending
+                           if conn.is_still_running(conn.get_query_status_throw_if_error(qid))]
+                if pending:
+                    time.sleep(0.25)
+            
+            # Record end time; the end timestamp is derived from the monotonic delta
+            t1 = time.perf_counter_ns()
+            execution_time = (t1 - t0) / 1e9
+            end_datetime = start_datetime + timedelta(seconds=execution_time)
             
-            return result_info
+            # Get results
+            copy_summary = self._summarize_copy_results(cursor, query_ids)
+            
+            # Get server-side timings and detailed table statistics
+            query_profile = self._get_query_profile(cursor, query_ids)
+            table_stats = self._get_table_statistics(cursor, target_table)
+            cursor.close()
+            healthy = True
+            
+            return self._build_result_info(load_mode, start_datetime, end_datetime,
+                                           execution_time, copy_summary, table_stats, query_profile)
             
         except Exception as e:
-            logger.error(f"Failed to execute COPY command with LOAD_MODE = {load_mode}: {e}")
+            logger.error("Failed to execute COPY command with LOAD_MODE = %s: %s", load_mode, e)
             return {
                 'load_mode': load_mode,
                 'execution_time_seconds': -1,
                 'error': str(e),
                 'success': False
             }
+        finally:
+            # A connection that failed mid-run may still have queries in flight; do not reuse it
+            if conn and healthy:
+                self._release_connection(conn)
+            elif conn:
+                conn.close()
+    
+    def _run_scenarios_parallel(self, scenarios) -> Dict[str, Dict[str, Any]]:
+        """Run all COPY scenarios concurrently, one connection and target table each."""
+        with ThreadPoolExecutor(max_workers=len(scenarios)) as executor:
+            futures = {
+                load_mode: executor.submit(
+                    self._execute_copy_async,
+                    load_mode,
+                    self.scenario_tables[load_mode]
+                )
+                for load_mode in scenarios
+            }
+            return {load_mode: future.result() for load_mode, future in futures.items()}
+    
+    def _prepare_next_run(self, cursor):
+        """Get the warehouse ready for the next COPY run."""
+        self._warm_warehouse(cursor)
+    
+    def _run_scenarios_sequential(self, scenarios) -> Dict[str, Dict[str, Any]]:
+        """Run the COPY scenarios one after another, each into its own target table.
+        
+        After each COPY, its table statistics are collected while the next run is
+        prepared on a second cursor, so the statistics queries stay off the critical path.
+        """
+        results = {}
+        prep_cursor = self.conn.cursor()
+        try:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                for step, load_mode in enumerate(scenarios, 3):
+                    logger.info(f"Step {step}: Testing {load_mode}...")
+                    target_table = self.scenario_tables[load_mode]
+                    result = self._execute_copy_command(
+                        load_mode,
+                        COPY_COMMANDS[load_mode],
+                        target_table,
+                        COPY_COMMAND_LINES[load_mode],
+                        warm=False,
+                        collect_stats=False
+                    )
+                    results[load_mode] = result
+                    
+                    prep_future = None
+                    if step - 3 + 1 < len(scenarios):
+                        prep_future = executor.submit(self._prepare_next_run, prep_cursor)
+                    
+                    if result['success']:
+                        result['table_statistics'] = self._get_table_statistics(table=target_table)
+                    
+                    if prep_future:
+                        prep_future.result()
+        finally:
+            prep_cursor.close()
+        return results
+    
+    def _run_batch_sweep(self, sizes=(10, 40, 100, 400)) -> Dict[str, Any]:
+        """Time FULL_INGEST (VECTORIZED=TRUE) with different files-per-COPY batch sizes."""
+        load_mode = 'FULL_INGEST (VECTORIZED=TRUE)'
+        table = self.scenario_tables[load_mode]
+        if not self.stage_files:
+            self.stage_files = self._list_stage_files()
+        
+        sweep = []
+        try:
+            for size in sizes:
+                logger.info(f"Batch sweep: {size} files per COPY")
+                self.cursor.execute(f"CREATE OR REPLACE TRANSIENT TABLE {table} LIKE {self.source_table}")
+                
+                result = self._execute_copy_async(load_mode, table, chunk_size=size)
+                if not result['success']:
+                    logger.error(f"Batch sweep failed for batch size {size}")
+                    continue
+                
+                elapsed = result['execution_time_seconds']
+                rows = result.get('rows_loaded', 0)
+                sweep.append((size, elapsed, rows / elapsed if elapsed > 0 else 0))
+        finally:
+            self.cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        
+        if not sweep:
+            return {'sweep': [], 'best_batch_size': None}
+        
+        best = max(sweep, key=lambda entry: entry[2])
+        
+        logger.info("=" * 80)
+        logger.info("BATCH SIZE SWEEP SUMMARY")
+        logger.info("=" * 80)
+        logger.info(f"{'Batch size':>12} {'Elapsed (s)':>12} {'Rows/sec':>14}")
+        for size, elapsed, rows_per_sec in sweep:
+            marker = "  🏆" if size == best[0] else ""
+            logger.info(f"{size:>12} {elapsed:>12.2f} {rows_per_sec:>14,.0f}{marker}")
+        logger.info(f"Best batch size: {best[0]} files per COPY ({best[2]:,.0f} rows/sec)")
+        
+        return {'sweep': sweep, 'best_batch_size': best[0]}
+    
+    def run_batch_sweep(self, sizes=(10, 40, 100, 400)) -> Dict[str, Any]:
+        """Connect and run the files-per-COPY batch size sweep."""
+        try:
+            if not self._connect_to_snowflake():
+                return {'sweep': [], 'best_batch_size': None}
+            return self._run_batch_sweep(sizes)
+        finally:
+            self._disconnect_from_snowflake()
     
     def run_performance_test(self) -> Dict[str, Any]:
         """Run the complete performance test comparing LOAD_MODE options."""
@@ -276,6 +835,11 @@ class LoadModePerformanceTest:
             'comparison': None
         }
         
+        scenarios = list(SCENARIOS)
+        tables_created = False
+        warehouse = {}
+        resized = False
+        
         try:
             # Step 1: Connect to Snowflake
             logger.info("Step 1: Connecting to Snowflake...")
@@ -283,6 +847,14 @@ class LoadModePerformanceTest:
                 logger.error("Failed to connect to Snowflake")
                 return test_results
             
+            warehouse = self._describe_warehouse()
+            test_results['warehouse'] = warehouse
+            shown_size = (warehouse.get('size') or '').upper()
+            current_size = _SHOWN_WAREHOUSE_SIZES.get(shown_size, shown_size.replace('-', ''))
+            if self.wh_size and warehouse.get('name') and current_size != self.wh_size:
+                resized = self._resize_warehouse(warehouse['name'], self.wh_size)
+            self._warm_warehouse(cold=self.cold_start)
+            
             # Step 2: Check stage files
             logger.info("Step 2: Checking stage files...")
             file_count = self._get_stage_file_count()
@@ -290,52 +862,57 @@ class LoadModePerformanceTest:
                 logger.error("No files found in stage. Please run the data pipeline first.")
                 return test_results
             
-            # Step 3: Test with LOAD_MODE = FULL_INGEST + VECTORIZED_SCANNER = TRUE
-            logger.info("Step 3: Testing FULL_INGEST + VECTORIZED_SCANNER = TRUE...")
-            
-            # Truncate table for clean test
-            if not self._truncate_table():
-                logger.error("Failed to truncate table")
-                return test_results
-            
-            # Execute COPY with FULL_INGEST + VECTORIZED
-            full_ingest_vectorized_result = self._execute_copy_command('FULL_INGEST (VECTORIZED=TRUE)', self.copy_command_full_ingest_vectorized)
-            test_results['full_ingest_vectorized_result'] = full_ingest_vectorized_result
+            if self.parallel and self.parallelism > 1:
+                self.stage_files = self._list_stage_files()
+                logger.info(f"Sharding {len(self.stage_files)} stage files across up to {self.parallelism} concurrent COPY statements")
             
-            # Step 4: Test with LOAD_MODE = ADD_FILES_COPY + VECTORIZED_SCANNER = TRUE
-            logger.info("Step 4: Testing ADD_FILES_COPY + VECTORIZED_SCANNER = TRUE...")
+            # Steps 3-5: Run the three scenarios, each into a fresh transient table per iteration
+            scenario_results = {}
+            iteration_times = defaultdict(list)
+            for iteration in range(1, self.iterations + 1):
+                order = random.sample(scenarios, k=len(scenarios)) if self.shuffle else scenarios
+                if self.iterations > 1:
+                    logger.info(f"Iteration {iteration}/{self.iterations}: {', '.join(order)}")
+                
+                if not self._create_scenario_tables():
+                    return test_results
+                tables_created = True
+                
+                if self.parallel:
+                    logger.info("Steps 3-5: Running all three scenarios concurrently...")
+                    iteration_results = self._run_scenarios_parallel(order)
+                else:
+                    iteration_results = self._run_scenarios_sequential(order)
+                
+                # Keep the latest successful result per scenario and collect its timings
+                for load_mode, result in iteration_results.items():
+                    if result['success']:
+                        iteration_times[load_mode].append(result['execution_time_seconds'])
+                    if result['success'] or load_mode not in scenario_results:
+                        scenario_results[load_mode] = result
             
-            # Truncate table for clean test
-            if not self._truncate_table():
-                logger.error("Failed to truncate table for second test")
-                return test_results
+            for load_mode, times in iteration_times.items():
+                scenario_results[load_mode].update({
+                    'iteration_times': times,
+                    'median_execution_time': statistics.median(times),
+                    'min_execution_time': min(times)
+                })
             
-            # Execute COPY with ADD_FILES_COPY + VECTORIZED
-            add_files_copy_result = self._execute_copy_command('ADD_FILES_COPY (VECTORIZED=TRUE)', self.copy_command_add_files_copy)
+            full_ingest_vectorized_result = scenario_results.get('FULL_INGEST (VECTORIZED=TRUE)')
+            add_files_copy_result = scenario_results.get('ADD_FILES_COPY (VECTORIZED=TRUE)')
+            full_ingest_non_vectorized_result = scenario_results.get('FULL_INGEST (VECTORIZED=FALSE)')
+            test_results['full_ingest_vectorized_result'] = full_ingest_vectorized_result
             test_results['add_files_copy_result'] = add_files_copy_result
+            test_results['full_ingest_non_vectorized_result'] = full_ingest_non_vectorized_result
             
-            # Step 5: Test with LOAD_MODE = FULL_INGEST + VECTORIZED_SCANNER = FALSE
-            logger.info("Step 5: Testing FULL_INGEST + VECTORIZED_SCANNER = FALSE...")
-            
-            # Truncate table for clean test
-            if not self._truncate_table():
-                logger.error("Failed to truncate table for third test")
+            if len(scenario_results) < len(scenarios):
                 return test_results
             
-            # Execute COPY with FULL_INGEST + NON-VECTORIZED
-            full_ingest_non_vectorized_result = self._execute_copy_command('FULL_INGEST (VECTORIZED=FALSE)', self.copy_command_full_ingest_non_vectorized)
-            test_results['full_ingest_non_vectorized_result'] = full_ingest_non_vectorized_result
-            
             # Step 6: Compare results
             logger.info("Step 6: Comparing all three results...")
             if (full_ingest_vectorized_result['success'] and add_files_copy_result['success'] and 
                 full_ingest_non_vectorized_result['success']):
-                comparison = self._compare_three_results(
-                    full_ingest_vectorized_result, 
-                    add_files_copy_result, 
-                    full_ingest_non_vectorized_result
-                )
-                test_results['comparison'] = comparison
+                test_results['comparison'] = self._compare_three_results(scenario_results)
             
             test_results['test_end_time'] = datetime.now()
             
@@ -350,74 +927,70 @@ class LoadModePerformanceTest:
             return test_results
         
         finally:
+            if tables_created:
+                self._drop_scenario_tables()
+            if resized and warehouse.get('size'):
+                self._resize_warehouse(warehouse['name'], warehouse['size'])
             self._disconnect_from_snowflake()
     
-    def _compare_three_results(self, full_ingest_vectorized: Dict[str, Any], 
-                              add_files_copy: Dict[str, Any], 
-                              full_ingest_non_vectorized: Dict[str, Any]) -> Dict[str, Any]:
-        """Compare the performance results between all three test scenarios."""
-        
-        # Extract execution times
-        time_full_vectorized = full_ingest_vectorized['execution_time_seconds']
-        time_add_files = add_files_copy['execution_time_seconds']
-        time_full_non_vectorized = full_ingest_non_vectorized['execution_time_seconds']
-        
-        # Extract throughputs
-        throughput_full_vectorized = full_ingest_vectorized.get('throughput_rows_per_second', 0)
-        throughput_add_files = add_files_copy.get('throughput_rows_per_second', 0)
-        throughput_full_non_vectorized = full_ingest_non_vectorized.get('throughput_rows_per_second', 0)
-        
-        # Find the fastest scenario
-        times = {
-            'FULL_INGEST (VECTORIZED=TRUE)': time_full_vectorized,
-            'ADD_FILES_COPY (VECTORIZED=TRUE)': time_add_files,
-            'FULL_INGEST (VECTORIZED=FALSE)': time_full_non_vectorized
-        }
+    def _compare_three_results(self, scenario_results: Dict[str, Dict[str, Any]]) -> ComparisonResult:
+        """Compare the performance results between all three test scenarios.
         
-        fastest_scenario = min(times.keys(), key=lambda k: times[k])
-        fastest_time = times[fastest_scenario]
+        With several iterations the median execution time of each scenario is compared.
+        """
         
-        # Calculate improvements relative to fastest
-        comparison = {
-            'fastest_scenario': fastest_scenario,
-            'fastest_time': fastest_time,
-            'results': {
-                'full_ingest_vectorized': {
-                    'time': time_full_vectorized,
-                    'throughput': throughput_full_vectorized,
-                    'rows': full_ingest_vectorized.get('rows_loaded', 0),
-                    'improvement_vs_fastest': ((fastest_time - time_full_vectorized) / fastest_time) * 100 if fastest_time > 0 else 0
-                },
-                'add_files_copy': {
-                    'time': time_add_files,
-                    'throughput': throughput_add_files,
-                    'rows': add_files_copy.get('rows_loaded', 0),
-                    'improvement_vs_fastest': ((fastest_time - time_add_files) / fastest_time) * 100 if fastest_time > 0 else 0
-                },
-                'full_ingest_non_vectorized': {
-                    'time': time_full_non_vectorized,
-                    'throughput': throughput_full_non_vectorized,
-                    'rows': full_ingest_non_vectorized.get('rows_loaded', 0),
-                    'improvement_vs_fastest': ((fastest_time - time_full_non_vectorized) / fastest_time) * 100 if fastest_time > 0 else 0
-                }
-            }
+        # Extract execution times and throughputs
+        times = {}
+        throughputs = {}
+        for load_mode in SCENARIOS:
+            times[load_mode], throughputs[load_mode] = self._time_and_throughput(scenario_results[load_mode])
+        
+        # Find the fastest scenario and calculate improvements relative to it
+        fastest_scenario = min(SCENARIOS, key=times.__getitem__)
+        fastest_time = times[fastest_scenario]
+        improvements = {
+            load_mode: ((fastest_time - times[load_mode]) / fastest_time) * 100 if fastest_time > 0 else 0
+            for load_mode in SCENARIOS
         }
         
         # Calculate vectorized scanner impact
-        vectorized_impact = ((time_full_non_vectorized - time_full_vectorized) / time_full_non_vectorized) * 100 if time_full_non_vectorized > 0 else 0
-        comparison['vectorized_scanner_improvement'] = vectorized_impact
+        time_vectorized = times['FULL_INGEST (VECTORIZED=TRUE)']
+        time_non_vectorized = times['FULL_INGEST (VECTORIZED=FALSE)']
+        vectorized_impact = ((time_non_vectorized - time_vectorized) / time_non_vectorized) * 100 if time_non_vectorized > 0 else 0
+        
+        comparison = ComparisonResult(
+            fastest_scenario=fastest_scenario,
+            fastest_time=fastest_time,
+            times=times,
+            throughputs=throughputs,
+            rows={load_mode: scenario_results[load_mode].get('rows_loaded', 0) for load_mode in SCENARIOS},
+            improvement_vs_fastest=improvements,
+            vectorized_scanner_improvement=vectorized_impact
+        )
         
         # Log detailed comparison
         logger.info("Performance comparison of all three scenarios:")
-        logger.info(f"  1. FULL_INGEST (VECTORIZED=TRUE):    {time_full_vectorized:.2f}s ({throughput_full_vectorized:,.0f} rows/sec)")
-        logger.info(f"  2. ADD_FILES_COPY (VECTORIZED=TRUE): {time_add_files:.2f}s ({throughput_add_files:,.0f} rows/sec)")
-        logger.info(f"  3. FULL_INGEST (VECTORIZED=FALSE):   {time_full_non_vectorized:.2f}s ({throughput_full_non_vectorized:,.0f} rows/sec)")
-        logger.info(f"")
-        logger.info(f"🏆 Fastest scenario: {fastest_scenario} ({fastest_time:.2f}s)")
-        logger.info(f"📊 VECTORIZED_SCANNER improvement: {vectorized_impact:.1f}% faster")
+        for i, load_mode in enumerate(SCENARIOS, 1):
+            logger.info("  %d. %-34s%.2fs (%s rows/sec)", i, load_mode + ':', times[load_mode],
+                        format(throughputs[load_mode], ',.0f'))
+        if self.iterations > 1:
+            logger.info("  (median of %d iterations; fastest runs: %s)", self.iterations,
+                        ' / '.join(f"{scenario_results[load_mode].get('min_execution_time', 0):.2f}s"
+                                   for load_mode in SCENARIOS))
+        logger.info("")
+        logger.info("🏆 Fastest scenario: %s (%.2fs)", fastest_scenario, fastest_time)
+        logger.info("📊 VECTORIZED_SCANNER improvement: %.1f%% faster", vectorized_impact)
         
         return comparison
     
+    @staticmethod
+    def _time_and_throughput(result: Dict[str, Any]) -> tuple:
+        """Median execution time over the iterations (or the single run's time) and its throughput."""
+        if 'median_execution_time' not in result:
+            return result['execution_time_seconds'], result.get('throughput_rows_per_second', 0)
+        median_time = result['median_execution_time']
+        return median_time, result.get('rows_loaded', 0) / median_time if median_time > 0 else 0
+    
     def _generate_summary_report(self, test_results: Dict[str, Any]):
         """Generate a comprehensive summary report."""
         logger.info("=" * 80)
@@ -425,8 +998,8 @@ class LoadModePerformanceTest:
         logger.info("=" * 80)
         
         total_time = test_results['test_end_time'] - test_results['test_start_time']
-        logger.info(f"Total test duration: {total_time}")
-        logger.info(f"Test completed at: {test_results['test_end_time']}")
+        logger.info("Total test duration: %s", total_time)
+        logger.info("Test completed at: %s", test_results['test_end_time'])
         
         # Results summary
         full_ingest_vectorized_result = test_results.get('full_ingest_vectorized_result')
@@ -437,37 +1010,47 @@ class LoadModePerformanceTest:
         if full_ingest_vectorized_result and add_files_copy_result and full_ingest_non_vectorized_result:
             logger.info("")
             logger.info("PERFORMANCE RESULTS:")
-            logger.info(f"  1. FULL_INGEST (VECTORIZED=TRUE):    {full_ingest_vectorized_result.get('execution_time_formatted', 'FAILED')}")
-            logger.info(f"  2. ADD_FILES_COPY (VECTORIZED=TRUE): {add_files_copy_result.get('execution_time_formatted', 'FAILED')}")
-            logger.info(f"  3. FULL_INGEST (VECTORIZED=FALSE):   {full_ingest_non_vectorized_result.get('execution_time_formatted', 'FAILED')}")
+            logger.info("  1. FULL_INGEST (VECTORIZED=TRUE):    %s", full_ingest_vectorized_result.get('execution_time_formatted', 'FAILED'))
+            logger.info("  2. ADD_FILES_COPY (VECTORIZED=TRUE): %s", add_files_copy_result.get('execution_time_formatted', 'FAILED'))
+            logger.info("  3. FULL_INGEST (VECTORIZED=FALSE):   %s", full_ingest_non_vectorized_result.get('execution_time_formatted', 'FAILED'))
+            
+            profiles = [
+                ('1. FULL_INGEST (VECTORIZED=TRUE):   ', full_ingest_vectorized_result.get('query_profile')),
+                ('2. ADD_FILES_COPY (VECTORIZED=TRUE):', add_files_copy_result.get('query_profile')),
+                ('3. FULL_INGEST (VECTORIZED=FALSE):  ', full_ingest_non_vectorized_result.get('query_profile'))
+            ]
+            if any(profile for _, profile in profiles):
+                logger.info("")
+                logger.info("SERVER-SIDE EXECUTION TIME (excludes compile and queue):")
+                for label, profile in profiles:
+                    if profile:
+                        logger.info("  %s %.2f seconds", label, profile['execution_time_ms'] / 1000)
             
             logger.info("")
             logger.info("THROUGHPUT RESULTS:")
             if full_ingest_vectorized_result.get('throughput_formatted'):
-                logger.info(f"  1. FULL_INGEST (VECTORIZED=TRUE):    {full_ingest_vectorized_result['throughput_formatted']}")
+                logger.info("  1. FULL_INGEST (VECTORIZED=TRUE):    %s", full_ingest_vectorized_result['throughput_formatted'])
             if add_files_copy_result.get('throughput_formatted'):
-                logger.info(f"  2. ADD_FILES_COPY (VECTORIZED=TRUE): {add_files_copy_result['throughput_formatted']}")
+                logger.info("  2. ADD_FILES_COPY (VECTORIZED=TRUE): %s", add_files_copy_result['throughput_formatted'])
             if full_ingest_non_vectorized_result.get('throughput_formatted'):
-                logger.info(f"  3. FULL_INGEST (VECTORIZED=FALSE):   {full_ingest_non_vectorized_result['throughput_formatted']}")
+                logger.info("  3. FULL_INGEST (VECTORIZED=FALSE):   %s", full_ingest_non_vectorized_result['throughput_formatted'])
             
-            if comparison and 'fastest_scenario' in comparison:
-                fastest = comparison['fastest_scenario']
-                vectorized_improvement = comparison.get('vectorized_scanner_improvement', 0)
+            if comparison:
+                fastest = comparison.fastest_scenario
+                vectorized_improvement = comparison.vectorized_scanner_improvement
                 
                 logger.info("")
-                logger.info(f"🏆 FASTEST SCENARIO: {fastest}")
-                logger.info(f"📊 VECTORIZED_SCANNER improvement: {vectorized_improvement:.1f}% faster than non-vectorized")
+                logger.info("🏆 FASTEST SCENARIO: %s", fastest)
+                logger.info("📊 VECTORIZED_SCANNER improvement: %.1f%% faster than non-vectorized", vectorized_improvement)
                 
                 # Show relative performance
-                results = comparison.get('results', {})
                 logger.info("")
                 logger.info("RELATIVE PERFORMANCE (vs fastest):")
-                for key, data in results.items():
-                    improvement = data.get('improvement_vs_fastest', 0)
+                for load_mode, improvement in comparison.improvement_vs_fastest.items():
                     if improvement >= 0:
-                        logger.info(f"  {key.replace('_', ' ').title()}: {improvement:.1f}% slower")
+                        logger.info("  %s: %.1f%% slower", load_mode, improvement)
                     else:
-                        logger.info(f"  {key.replace('_', ' ').title()}: {abs(improvement):.1f}% faster")
+                        logger.info("  %s: %.1f%% faster", load_mode, abs(improvement))
         
         logger.info("")
         logger.info("KEY INSIGHTS:")
@@ -479,14 +1062,14 @@ class LoadModePerformanceTest:
         
         logger.info("")
         logger.info("RECOMMENDATIONS:")
-        if comparison and 'fastest_scenario' in comparison:
-            winner = comparison['fastest_scenario']
-            vectorized_improvement = comparison.get('vectorized_scanner_improvement', 0)
-            logger.info(f"  🥇 PRIMARY: Use {winner} for optimal performance")
-            logger.info(f"  📈 ALWAYS use USE_VECTORIZED_SCANNER = TRUE ({vectorized_improvement:.1f}% improvement)")
+        if comparison:
+            winner = comparison.fastest_scenario
+            vectorized_improvement = comparison.vectorized_scanner_improvement
+            logger.info("  🥇 PRIMARY: Use %s for optimal performance", winner)
+            logger.info("  📈 ALWAYS use USE_VECTORIZED_SCANNER = TRUE (%.1f%% improvement)", vectorized_improvement)
             
             if vectorized_improvement > 20:
-                logger.info(f"  ⚠️  CRITICAL: VECTORIZED_SCANNER provides {vectorized_improvement:.1f}% performance boost!")
+                logger.info("  ⚠️  CRITICAL: VECTORIZED_SCANNER provides %.1f%% performance boost!", vectorized_improvement)
             
             # Specific recommendations based on use case
             logger.info("")
@@ -504,8 +1087,27 @@ class LoadModePerformanceTest:
 
 def main():
     """Main entry point."""
+    parser = argparse.ArgumentParser(description="Snowflake LOAD_MODE performance test")
+    parser.add_argument('--sweep', action='store_true',
+                        help="run a files-per-COPY batch size sweep instead of the scenario comparison")
+    parser.add_argument('--cold-start', action='store_true',
+                        help="suspend and resume the warehouse before the timed runs to clear its cache")
+    parser.add_argument('--wh-size', choices=WAREHOUSE_SIZES, type=str.upper,
+                        help="resize the warehouse for the test and restore the original size afterwards")
+    parser.add_argument('--iterations', type=int, default=3,
+                        help="number of times to run every scenario; medians are compared (default: 3)")
+    parser.add_argument('--shuffle', action='store_true',
+                        help="randomize the scenario order in each iteration")
+    args = parser.parse_args()
+    
     try:
-        test = LoadModePerformanceTest()
+        test = LoadModePerformanceTest(cold_start=args.cold_start, wh_size=args.wh_size,
+                                       iterations=max(1, args.iterations), shuffle=args.shuffle)
+        
+        if args.sweep:
+            sweep_results = test.run_batch_sweep()
+            sys.exit(0 if sweep_results['best_batch_size'] else 1)
+        
         results = test.run_performance_test()
         
         if (results.get('comparison') or (results.get('full_ingest_vectorized_result') and 
@@ -522,6 +1124,8 @@ def main():
     except Exception as e:
         logger.error(f"Test failed: {e}")
         sys.exit(1)
+    finally:
+        _stop_log_listener()
 
 
 if __name__ == "__main__":
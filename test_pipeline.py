@@ -4,51 +4,128 @@ Test version of the equity data pipeline that works without Snowflake and S3.
 This version uses a hardcoded list of tickers and saves files locally for testing.
 """
 
+import argparse
+import atexit
+import gzip
+import hashlib
 import json
 import logging
+import logging.handlers
+import queue
 import time
-from datetime import datetime, timedelta, timezone
-import pytz
+from datetime import date, timedelta
 from typing import List, Dict, Any, Optional
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
-import pandas as pd
 import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.fs as pafs
 import pyarrow.parquet as pq
 
-# Configure logging
+from polygon_client import RateLimiter, build_session
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # optional speed-up; stdlib json parses the same payloads
+    _json_loads = json.loads
+
+# Configure logging: records are queued and written by a background listener
+# thread so worker threads never block on file/console I/O
+_log_queue = queue.Queue(-1)
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_file_handler = logging.FileHandler('test_pipeline.log')
+_log_file_handler.setFormatter(_log_formatter)
+_log_stream_handler = logging.StreamHandler(sys.stdout)
+_log_stream_handler.setFormatter(_log_formatter)
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_file_handler, _log_stream_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# The queue handler only passes the message through; the listener's handlers format it
+_log_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_log_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('test_pipeline.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
+    handlers=[_log_queue_handler]
 )
 logger = logging.getLogger(__name__)
 
+# Parquet schema for the monthly files; timestamps are TIMESTAMP_MICROS for Snowflake TIMESTAMP_NTZ
+PARQUET_SCHEMA = pa.schema([
+    pa.field('TICKER', pa.string()),
+    pa.field('OHLC_DATE', pa.timestamp('us')),
+    pa.field('OPEN_PRICE', pa.float64()),
+    pa.field('HIGH_PRICE', pa.float64()),
+    pa.field('LOW_PRICE', pa.float64()),
+    pa.field('CLOSE_PRICE', pa.float64()),
+    pa.field('TRADING_VOLUME', pa.float64()),
+    pa.field('OHLC_TIMESTAMP', pa.timestamp('us'))
+])
+
 
 class TestEquityDataPipeline:
     """
     Test version of the equity data pipeline for validation.
     """
     
-    def __init__(self):
-        """Initialize the test pipeline."""
+    def __init__(self, mode: str = 'local'):
+        """Initialize the test pipeline.
+        
+        mode='local' writes the monthly Parquet files under test_output/;
+        mode='s3' writes them straight to the S3 bucket with no local copy.
+        """
         self.polygon_api_key = self._get_polygon_api_key()
+        self.mode = mode
         
         # Test constants - shorter date range and fewer tickers
         self.RATE_LIMIT_DELAY = 12.5  # seconds between API calls
         self.START_DATE = '2024-01-01'
         self.END_DATE = '2024-01-31'  # Just January for testing
         self.TEST_TICKERS = ['AAPL', 'MSFT', 'GOOGL']  # Small set for testing
+        self.COMPRESSION = 'zstd'  # Parquet codec for the monthly files
+        self.COMPRESSION_LEVEL = 1
+        self.MAX_WORKERS = 8  # concurrent ticker workers; API calls still go through the rate limiter
+        
+        # Shared by all worker threads so concurrent fetches respect the Polygon.io quota
+        self.rate_limiter = RateLimiter(self.RATE_LIMIT_DELAY)
+        
+        # Keep-alive HTTP session sized for the worker pool, with 429/5xx backoff
+        self.session = build_session(pool_maxsize=16, total_retries=5, backoff_factor=0.5)
+        
+        # Aggregates endpoint template and query parameters, built once and shared by every request
+        self._base_url_tpl = "https://api.polygon.io/v2/aggs/ticker/{}/range/1/day/{}/{}"
+        self._base_params = {
+            'apikey': self.polygon_api_key,
+            'adjusted': 'true',
+            'sort': 'asc'
+        }
+        
+        # Grouped daily endpoint: every US stock's bar for one date in a single request
+        self._grouped_url_tpl = "https://api.polygon.io/v2/aggs/grouped/locale/us/market/stocks/{}"
+        self._grouped_params = {
+            'apikey': self.polygon_api_key,
+            'adjusted': 'true'
+        }
         
         # Create output directory
         self.output_dir = 'test_output'
         os.makedirs(self.output_dir, exist_ok=True)
         
+        # S3 target for mode='s3'; test files go under their own prefix
+        self.S3_BUCKET = 'sp500-top-10-sector-leaders-ohlcv-s3bkt'
+        self.S3_PREFIX = 'test_pipeline'
+        self.s3_fs = pafs.S3FileSystem(region=os.getenv('AWS_REGION', 'us-east-1')) if mode == 's3' else None
+        
+        # On-disk cache of API responses so reruns skip the rate-limited fetch
+        self.cache_dir = os.path.join('.cache', 'polygon')
+        self.CACHE_TTL_HISTORICAL = 24 * 3600  # seconds, windows ending before today
+        self.CACHE_TTL_CURRENT = 3600  # seconds, windows that include today
+        
         logger.info("Test Equity Data Pipeline initialized")
     
     def _get_polygon_api_key(self) -> str:
@@ -61,74 +138,160 @@ class TestEquityDataPipeline:
         logger.info("Polygon.io API key loaded from environment variable")
         return api_key
     
+    def _cache_path(self, ticker: str, start_date: str, end_date: str) -> str:
+        """Cache file for one (ticker, start, end) request."""
+        key = hashlib.md5(f"{ticker}|{start_date}|{end_date}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, ticker, f"{key}.json.gz")
+    
+    def _cache_get(self, ticker: str, start_date: str, end_date: str) -> Optional[Dict[str, Any]]:
+        """Return a cached API response if present and not expired."""
+        path = self._cache_path(ticker, start_date, end_date)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            ttl = self.CACHE_TTL_CURRENT if end_date >= date.today().isoformat() else self.CACHE_TTL_HISTORICAL
+            if age > ttl:
+                return None
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _cache_put(self, ticker: str, start_date: str, end_date: str, data: Dict[str, Any]) -> None:
+        """Store an API response; written to a temp file and renamed so readers never see partial files."""
+        path = self._cache_path(ticker, start_date, end_date)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not cache response for {ticker}: {e}")
+    
     def _get_polygon_data(self, ticker: str, start_date: str, end_date: str) -> Optional[Dict[str, Any]]:
-        """Fetch OHLCV data from Polygon.io API."""
-        url = f"https://api.polygon.io/v2/aggs/ticker/{ticker}/range/1/day/{start_date}/{end_date}"
-        params = {
-            'apikey': self.polygon_api_key,
-            'adjusted': 'true',
-            'sort': 'asc'
-        }
+        """Fetch OHLCV data from Polygon.io API, serving repeated requests from the disk cache."""
+        cached = self._cache_get(ticker, start_date, end_date)
+        if cached is not None:
+            logger.info(f"Using cached data for {ticker} from {start_date} to {end_date}")
+            return cached
+        
+        url = self._base_url_tpl.format(ticker, start_date, end_date)
         
         try:
+            waited = self.rate_limiter.wait()
+            if waited:
+                logger.info(f"Rate limiting: waited {waited:.1f} seconds before fetching {ticker}")
+            
             logger.info(f"Fetching data for {ticker} from {start_date} to {end_date}")
-            response = requests.get(url, params=params, timeout=30)
+            response = self.session.get(url, params=self._base_params, timeout=30)
             response.raise_for_status()
             
-            data = response.json()
+            data = _json_loads(response.content)
             
             if data.get('status') == 'OK' and data.get('results'):
                 logger.info(f"Successfully retrieved {len(data['results'])} records for {ticker}")
+                self._cache_put(ticker, start_date, end_date, data)
                 return data
             else:
                 logger.warning(f"No data available for {ticker}")
                 return None
                 
+        except requests.Timeout:
+            logger.error(f"Timed out fetching data for {ticker}")
+            return None
+        except requests.HTTPError as e:
+            logger.error(f"HTTP error fetching data for {ticker}: {e.response.status_code} {e}")
+            return None
         except Exception as e:
             logger.error(f"Failed to fetch data for {ticker}: {e}")
             return None
     
-    def _process_monthly_data(self, ticker: str, data: Dict[str, Any]) -> Dict[str, pd.DataFrame]:
-        """Process API data and organize it by month."""
-        if not data.get('results'):
-            return {}
+    def _get_polygon_grouped(self, day: str) -> Optional[Dict[str, Any]]:
+        """Fetch all US stocks' daily bars for one date, serving repeated requests from the disk cache."""
+        cached = self._cache_get('_grouped', day, day)
+        if cached is not None:
+            logger.info(f"Using cached grouped data for {day}")
+            return cached
+        
+        url = self._grouped_url_tpl.format(day)
         
-        # Convert API results to DataFrame
-        records = []
-        for result in data['results']:
-            # Convert Unix timestamp (milliseconds) to datetime in Eastern Time
-            utc_dt = datetime.fromtimestamp(result['t'] / 1000, tz=timezone.utc)
-            et_tz = pytz.timezone('US/Eastern')
-            date = utc_dt.astimezone(et_tz)
+        try:
+            waited = self.rate_limiter.wait()
+            if waited:
+                logger.info(f"Rate limiting: waited {waited:.1f} seconds before fetching {day}")
+            
+            logger.info(f"Fetching grouped daily data for {day}")
+            response = self.session.get(url, params=self._grouped_params, timeout=30)
+            response.raise_for_status()
+            
+            data = _json_loads(response.content)
             
-            record = {
-                'TICKER': ticker,
-                'OHLC_DATE': date.strftime('%Y-%m-%d'),
-                'OPEN_PRICE': result['o'],
-                'HIGH_PRICE': result['h'],
-                'LOW_PRICE': result['l'],
-                'CLOSE_PRICE': result['c'],
-                'TRADING_VOLUME': result['v'],
-                'OHLC_TIMESTAMP': result['t']  # Keep milliseconds for TIMESTAMP_MILLIS
-            }
-            records.append(record)
-        
-        df = pd.DataFrame(records)
-        df['OHLC_DATE'] = pd.to_datetime(df['OHLC_DATE'])
-        # Convert OHLC_TIMESTAMP to datetime for TIMESTAMP_MILLIS format
-        df['OHLC_TIMESTAMP'] = pd.to_datetime(df['OHLC_TIMESTAMP'], unit='ms')
-        
-        # Group by year-month
+            if data.get('status') == 'OK' and data.get('results'):
+                logger.info(f"Successfully retrieved {len(data['results'])} records for {day}")
+                self._cache_put('_grouped', day, day, data)
+                return data
+            else:
+                logger.info(f"No market data for {day} (market closed)")
+                return None
+                
+        except requests.Timeout:
+            logger.error(f"Timed out fetching grouped data for {day}")
+            return None
+        except requests.HTTPError as e:
+            logger.error(f"HTTP error fetching grouped data for {day}: {e.response.status_code} {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Failed to fetch grouped data for {day}: {e}")
+            return None
+    
+    def _business_days(self) -> List[str]:
+        """Weekdays from START_DATE to END_DATE inclusive; market holidays come back empty from the API."""
+        day = date.fromisoformat(self.START_DATE)
+        end = date.fromisoformat(self.END_DATE)
+        days = []
+        while day <= end:
+            if day.weekday() < 5:
+                days.append(day.isoformat())
+            day += timedelta(days=1)
+        return days
+    
+    def _process_monthly_data(self, ticker: str, data: Dict[str, Any]) -> Dict[str, pa.Table]:
+        """Process API data into Arrow tables organized by month."""
+        results = data.get('results')
+        if not results:
+            return {}
+        
+        # Build Arrow columns straight from the API records, no pandas intermediate
+        timestamps = pa.array([r['t'] for r in results], type=pa.timestamp('ms'))  # TIMESTAMP_MILLIS, UTC
+        
+        # Trading date is the calendar day in US/Eastern
+        local_times = pc.local_timestamp(timestamps.cast(pa.timestamp('ms', tz='US/Eastern')))
+        trade_dates = pc.floor_temporal(local_times, unit='day')
+        
+        table = pa.table({
+            'TICKER': pa.array([ticker] * len(results), type=pa.string()),
+            'OHLC_DATE': trade_dates,
+            'OPEN_PRICE': pa.array([r['o'] for r in results], type=pa.float64()),
+            'HIGH_PRICE': pa.array([r['h'] for r in results], type=pa.float64()),
+            'LOW_PRICE': pa.array([r['l'] for r in results], type=pa.float64()),
+            'CLOSE_PRICE': pa.array([r['c'] for r in results], type=pa.float64()),
+            'TRADING_VOLUME': pa.array([r['v'] for r in results], type=pa.float64()),
+            'OHLC_TIMESTAMP': timestamps
+        }).cast(PARQUET_SCHEMA)
+        
+        # Split by year-month on an integer YYYYMM key (cheaper than formatting strings)
+        month_keys = pc.add(pc.multiply(pc.year(trade_dates), 100), pc.month(trade_dates))
         monthly_data = {}
-        for (year, month), group in df.groupby([df['OHLC_DATE'].dt.year, df['OHLC_DATE'].dt.month]):
-            month_key = f"{year:04d}-{month:02d}"
-            monthly_data[month_key] = group.copy()
-            logger.info(f"Processed {len(group)} records for {ticker} in {month_key}")
+        for key in sorted(pc.unique(month_keys).to_pylist()):
+            month_key = f"{key // 100}-{key % 100:02d}"
+            month_table = table.filter(pc.equal(month_keys, key))
+            monthly_data[month_key] = month_table
+            logger.debug(f"Processed {month_table.num_rows} records for {ticker} in {month_key}")
         
         return monthly_data
     
-    def _save_to_parquet_local(self, ticker: str, month: str, df: pd.DataFrame) -> bool:
-        """Save DataFrame to Parquet format locally."""
+    def _save_to_parquet_local(self, ticker: str, month: str, table: pa.Table) -> bool:
+        """Save an Arrow table to Parquet format locally."""
         try:
             # Create ticker directory
             ticker_dir = os.path.join(self.output_dir, ticker)
@@ -139,29 +302,46 @@ class TestEquityDataPipeline:
             filename = f"{ticker}_{month_formatted}.parquet"
             filepath = os.path.join(ticker_dir, filename)
             
-            # Create schema with TIMESTAMP_MILLIS for OHLC_TIMESTAMP
-            schema = pa.schema([
-                pa.field('TICKER', pa.string()),
-                pa.field('OHLC_DATE', pa.timestamp('us')),
-                pa.field('OPEN_PRICE', pa.float64()),
-                pa.field('HIGH_PRICE', pa.float64()),
-                pa.field('LOW_PRICE', pa.float64()),
-                pa.field('CLOSE_PRICE', pa.float64()),
-                pa.field('TRADING_VOLUME', pa.float64()),
-                pa.field('OHLC_TIMESTAMP', pa.timestamp('us'))  # TIMESTAMP_MICROS for Snowflake TIMESTAMP_NTZ
-            ])
+            self._write_parquet(table, filepath)
             
-            # Convert to Parquet format with explicit schema
-            table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
-            pq.write_table(table, filepath, compression='snappy')
-            
-            logger.info(f"Saved {filepath} ({len(df)} records)")
+            logger.info(f"Saved {filepath} ({table.num_rows} records)")
             return True
             
         except Exception as e:
             logger.error(f"Failed to save data for {ticker} {month}: {e}")
             return False
     
+    def _save_to_parquet_s3(self, ticker: str, month: str, table: pa.Table) -> bool:
+        """Write an Arrow table as Parquet directly to S3, skipping the local disk."""
+        try:
+            month_formatted = month.replace('-', '_')  # Convert 2024-01 to 2024_01
+            s3_key = f"{self.S3_PREFIX}/{ticker}/{ticker}_{month_formatted}.parquet"
+            
+            self._write_parquet(table, f"{self.S3_BUCKET}/{s3_key}", filesystem=self.s3_fs)
+            
+            logger.info(f"Saved s3://{self.S3_BUCKET}/{s3_key} ({table.num_rows} records)")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to save data for {ticker} {month} to S3: {e}")
+            return False
+    
+    def _write_parquet(self, table: pa.Table, where: str, filesystem: pafs.FileSystem = None) -> None:
+        """Write one month's table with the pipeline's Parquet settings."""
+        # Write from one contiguous chunk per column so pages are not split at chunk boundaries
+        table = table.combine_chunks()
+        
+        # Dictionary encoding and column statistics buy nothing for these small numeric files;
+        # each month fits in a single row group
+        pq.write_table(table, where,
+                       filesystem=filesystem,
+                       compression=self.COMPRESSION,
+                       compression_level=self.COMPRESSION_LEVEL,
+                       use_dictionary=False,
+                       write_statistics=False,
+                       data_page_size=1 << 20,
+                       row_group_size=max(table.num_rows, 1))
+    
     def process_ticker(self, ticker: str) -> bool:
         """Process a single ticker."""
         logger.info(f"Processing ticker: {ticker}")
@@ -176,13 +356,8 @@ class TestEquityDataPipeline:
                 # Process and organize data by month
                 monthly_data = self._process_monthly_data(ticker, data)
                 
-                # Save each month's data locally
-                for month, df in monthly_data.items():
-                    total_months += 1
-                    if self._save_to_parquet_local(ticker, month, df):
-                        success_count += 1
-                    else:
-                        logger.error(f"Failed to save {ticker} for month {month}")
+                total_months = len(monthly_data)
+                success_count = self._save_monthly_data(ticker, monthly_data)
             else:
                 logger.warning(f"No data retrieved for {ticker}")
             
@@ -193,35 +368,62 @@ class TestEquityDataPipeline:
             logger.error(f"Error processing ticker {ticker}: {e}")
             return False
     
+    def _save_monthly_data(self, ticker: str, monthly_data: Dict[str, pa.Table]) -> int:
+        """Save each month's data locally or straight to S3; returns the number of months saved."""
+        save = self._save_to_parquet_s3 if self.mode == 's3' else self._save_to_parquet_local
+        success_count = 0
+        for month, table in monthly_data.items():
+            if save(ticker, month, table):
+                success_count += 1
+            else:
+                logger.error(f"Failed to save {ticker} for month {month}")
+        return success_count
+    
+    @classmethod
+    def _tree_lines(cls, path: str, level: int = 1) -> List[str]:
+        """List a directory tree with one scandir pass per directory (no extra stat calls)."""
+        lines = []
+        with os.scandir(path) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                if entry.is_dir(follow_symlinks=False):
+                    lines.append(f"{'  ' * level}{entry.name}/")
+                    lines.extend(cls._tree_lines(entry.path, level + 1))
+                else:
+                    lines.append(f"{'  ' * level}{entry.name}")
+        return lines
+    
     def run(self) -> None:
         """Run the test pipeline."""
         logger.info("Starting Test Equity Data Pipeline")
         logger.info(f"Date range: {self.START_DATE} to {self.END_DATE}")
         logger.info(f"Test tickers: {self.TEST_TICKERS}")
-        logger.info(f"Output directory: {self.output_dir}")
+        if self.mode == 's3':
+            logger.info(f"Output location: s3://{self.S3_BUCKET}/{self.S3_PREFIX}/")
+        else:
+            logger.info(f"Output directory: {self.output_dir}")
         
         successful_tickers = 0
         failed_tickers = []
         
-        for i, ticker in enumerate(self.TEST_TICKERS, 1):
-            logger.info(f"Processing ticker {i}/{len(self.TEST_TICKERS)}: {ticker}")
+        # Tickers are processed concurrently; the shared rate limiter spaces the API calls
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(self.TEST_TICKERS))) as executor:
+            futures = {executor.submit(self.process_ticker, ticker): ticker for ticker in self.TEST_TICKERS}
             
-            try:
-                if self.process_ticker(ticker):
-                    successful_tickers += 1
-                    logger.info(f"✓ Successfully processed {ticker}")
-                else:
-                    failed_tickers.append(ticker)
-                    logger.error(f"✗ Failed to process {ticker}")
+            for i, future in enumerate(as_completed(futures), 1):
+                ticker = futures[future]
+                logger.info(f"Finished ticker {i}/{len(self.TEST_TICKERS)}: {ticker}")
                 
-                # Rate limiting between tickers
-                if i < len(self.TEST_TICKERS):
-                    logger.info(f"Rate limiting: waiting {self.RATE_LIMIT_DELAY} seconds...")
-                    time.sleep(self.RATE_LIMIT_DELAY)
-                    
-            except Exception as e:
-                failed_tickers.append(ticker)
-                logger.error(f"Exception processing {ticker}: {e}")
+                try:
+                    if future.result():
+                        successful_tickers += 1
+                        logger.info(f"✓ Successfully processed {ticker}")
+                    else:
+                        failed_tickers.append(ticker)
+                        logger.error(f"✗ Failed to process {ticker}")
+                        
+                except Exception as e:
+                    failed_tickers.append(ticker)
+                    logger.error(f"Exception processing {ticker}: {e}")
         
         # Summary
         logger.info("=" * 50)
@@ -235,28 +437,80 @@ class TestEquityDataPipeline:
             logger.warning(f"Failed tickers: {', '.join(failed_tickers)}")
         
         # Show output structure
-        if successful_tickers > 0:
-            logger.info("\nOutput structure:")
-            for root, dirs, files in os.walk(self.output_dir):
-                level = root.replace(self.output_dir, '').count(os.sep)
-                indent = ' ' * 2 * level
-                logger.info(f"{indent}{os.path.basename(root)}/")
-                subindent = ' ' * 2 * (level + 1)
-                for file in files:
-                    logger.info(f"{subindent}{file}")
+        if successful_tickers > 0 and self.mode == 'local':
+            lines = ["\nOutput structure:", f"{os.path.basename(self.output_dir)}/"]
+            lines.extend(self._tree_lines(self.output_dir))
+            logger.info('\n'.join(lines))
+        
+        logger.info("Test pipeline completed")
+    
+    def run_grouped(self) -> None:
+        """Run the test pipeline with one grouped-daily request per business day instead of one per ticker."""
+        days = self._business_days()
+        logger.info("Starting Test Equity Data Pipeline (grouped daily)")
+        logger.info(f"Date range: {self.START_DATE} to {self.END_DATE} ({len(days)} business days)")
+        logger.info(f"Test tickers: {self.TEST_TICKERS}")
+        
+        # Collect each test ticker's bars across all days; map() keeps the days in order
+        wanted = set(self.TEST_TICKERS)
+        ticker_results = {ticker: [] for ticker in self.TEST_TICKERS}
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, max(len(days), 1))) as executor:
+            for data in executor.map(self._get_polygon_grouped, days):
+                if not data:
+                    continue
+                for record in data['results']:
+                    if record.get('T') in wanted:
+                        ticker_results[record['T']].append(record)
+        
+        successful_tickers = 0
+        failed_tickers = []
+        
+        for ticker in self.TEST_TICKERS:
+            monthly_data = self._process_monthly_data(ticker, {'results': ticker_results[ticker]})
+            success_count = self._save_monthly_data(ticker, monthly_data)
+            logger.info(f"Completed {ticker}: {success_count}/{len(monthly_data)} months successful")
+            
+            if monthly_data and success_count == len(monthly_data):
+                successful_tickers += 1
+                logger.info(f"✓ Successfully processed {ticker}")
+            else:
+                failed_tickers.append(ticker)
+                logger.error(f"✗ Failed to process {ticker}")
+        
+        # Summary
+        logger.info("=" * 50)
+        logger.info("TEST PIPELINE SUMMARY (GROUPED DAILY)")
+        logger.info("=" * 50)
+        logger.info(f"API requests: {len(days)} (one per business day)")
+        logger.info(f"Total tickers: {len(self.TEST_TICKERS)}")
+        logger.info(f"Successful: {successful_tickers}")
+        logger.info(f"Failed: {len(failed_tickers)}")
+        
+        if failed_tickers:
+            logger.warning(f"Failed tickers: {', '.join(failed_tickers)}")
         
         logger.info("Test pipeline completed")
 
 
 def main():
     """Main entry point."""
+    parser = argparse.ArgumentParser(description="Test equity data pipeline")
+    parser.add_argument('--mode', choices=['local', 's3'], default='local',
+                        help="write Parquet files locally (default) or directly to S3")
+    parser.add_argument('--grouped', action='store_true',
+                        help="fetch one grouped-daily request per business day instead of one per ticker")
+    args = parser.parse_args()
+    
     try:
         if not os.path.exists('config.json'):
             logger.error("config.json not found")
             sys.exit(1)
         
-        pipeline = TestEquityDataPipeline()
-        pipeline.run()
+        pipeline = TestEquityDataPipeline(mode=args.mode)
+        if args.grouped:
+            pipeline.run_grouped()
+        else:
+            pipeline.run()
         
     except KeyboardInterrupt:
         logger.info("Pipeline interrupted by user")
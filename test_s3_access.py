@@ -3,8 +3,11 @@
 Test AWS S3 access with the configured credentials.
 """
 
+import io
 import sys
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 def test_s3_access():
     """Test S3 access with current credentials."""
@@ -48,78 +51,99 @@ def test_s3_access():
         print(f"   ❌ Failed to create S3 client: {e}")
         return False
     
-    # Test credentials by listing buckets
-    print("\n4. Testing credentials (listing buckets)...")
-    try:
-        response = s3_client.list_buckets()
-        buckets = response.get('Buckets', [])
-        print(f"   ✅ Credentials valid - found {len(buckets)} buckets")
-        
-        # Show available buckets
-        if buckets:
-            print("   Available buckets:")
-            for bucket in buckets[:10]:  # Show first 10
-                print(f"      - {bucket['Name']}")
-            if len(buckets) > 10:
-                print(f"      ... and {len(buckets) - 10} more")
-        
-    except NoCredentialsError:
-        print("   ❌ No AWS credentials found")
-        return False
-    except ClientError as e:
-        print(f"   ❌ AWS error: {e}")
-        return False
-    except Exception as e:
-        print(f"   ❌ Unexpected error: {e}")
-        return False
-    
-    # Test access to our specific bucket
-    print("\n5. Testing access to target bucket...")
     bucket_name = 'sp500-top-10-sector-leaders-ohlcv-s3bkt'
-    try:
-        s3_client.head_bucket(Bucket=bucket_name)
-        print(f"   ✅ Target bucket '{bucket_name}' is accessible")
+    
+    # The credential, bucket and listing probes are independent; run them concurrently
+    # and report the results in order
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list_buckets_future = executor.submit(s3_client.list_buckets)
+        head_bucket_future = executor.submit(s3_client.head_bucket, Bucket=bucket_name)
+        list_objects_future = executor.submit(s3_client.list_objects_v2, Bucket=bucket_name, MaxKeys=5)
         
-        # Test listing objects (if any)
+        # Test credentials by listing buckets
+        print("\n4. Testing credentials (listing buckets)...")
         try:
-            response = s3_client.list_objects_v2(Bucket=bucket_name, MaxKeys=5)
-            object_count = response.get('KeyCount', 0)
-            print(f"   ✅ Bucket contains {object_count} objects (showing first 5)")
+            response = list_buckets_future.result()
+            buckets = response.get('Buckets', [])
+            print(f"   ✅ Credentials valid - found {len(buckets)} buckets")
             
-            if 'Contents' in response:
-                for obj in response['Contents']:
-                    print(f"      - {obj['Key']} ({obj['Size']} bytes)")
+            # Show available buckets
+            if buckets:
+                print("   Available buckets:")
+                for bucket in buckets[:10]:  # Show first 10
+                    print(f"      - {bucket['Name']}")
+                if len(buckets) > 10:
+                    print(f"      ... and {len(buckets) - 10} more")
+            
+        except NoCredentialsError:
+            print("   ❌ No AWS credentials found")
+            return False
+        except ClientError as e:
+            print(f"   ❌ AWS error: {e}")
+            return False
         except Exception as e:
-            print(f"   ⚠️  Could not list objects: {e}")
+            print(f"   ❌ Unexpected error: {e}")
+            return False
+        
+        # Test access to our specific bucket
+        print("\n5. Testing access to target bucket...")
+        try:
+            head_bucket_future.result()
+            print(f"   ✅ Target bucket '{bucket_name}' is accessible")
             
-    except ClientError as e:
-        error_code = e.response['Error']['Code']
-        if error_code == '404':
-            print(f"   ❌ Bucket '{bucket_name}' not found")
-            print("   You may need to create this bucket first")
-        elif error_code == '403':
-            print(f"   ❌ Access denied to bucket '{bucket_name}'")
-            print("   Check your AWS permissions")
-        else:
-            print(f"   ❌ Error accessing bucket: {e}")
-        return False
+            # Test listing objects (if any)
+            try:
+                response = list_objects_future.result()
+                object_count = response.get('KeyCount', 0)
+                print(f"   ✅ Bucket contains {object_count} objects (showing first 5)")
+                
+                if 'Contents' in response:
+                    for obj in response['Contents']:
+                        print(f"      - {obj['Key']} ({obj['Size']} bytes)")
+            except Exception as e:
+                print(f"   ⚠️  Could not list objects: {e}")
+                
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            if error_code == '404':
+                print(f"   ❌ Bucket '{bucket_name}' not found")
+                print("   You may need to create this bucket first")
+            elif error_code == '403':
+                print(f"   ❌ Access denied to bucket '{bucket_name}'")
+                print("   Check your AWS permissions")
+            else:
+                print(f"   ❌ Error accessing bucket: {e}")
+            return False
     
-    # Test upload capability with a small test file
+    # Test upload capability with a batch of small test files uploaded concurrently
     print("\n6. Testing upload capability...")
     try:
-        test_content = "Test file for S3 upload capability"
-        test_key = "test/pipeline_test.txt"
+        from boto3.s3.transfer import TransferConfig
         
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key=test_key,
-            Body=test_content.encode('utf-8')
+        transfer_config = TransferConfig(
+            max_concurrency=10,
+            multipart_chunksize=8 * 1024 * 1024,
+            use_threads=True
         )
-        print(f"   ✅ Successfully uploaded test file: {test_key}")
+        test_keys = [f"test/pipeline_test_{i:02d}.txt" for i in range(10)]
         
-        # Clean up test file
-        s3_client.delete_object(Bucket=bucket_name, Key=test_key)
-        print(f"   ✅ Test file cleaned up")
+        def upload_test_file(key):
+            body = io.BytesIO(f"Test file for S3 upload capability ({key})".encode('utf-8'))
+            s3_client.upload_fileobj(body, bucket_name, key, Config=transfer_config)
+            return key
+        
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=transfer_config.max_concurrency) as executor:
+            uploaded = list(executor.map(upload_test_file, test_keys))
+        elapsed = time.perf_counter() - start_time
+        print(f"   ✅ Uploaded {len(uploaded)} test files concurrently in {elapsed:.2f}s")
+        
+        # Clean up test files in a single request
+        s3_client.delete_objects(
+            Bucket=bucket_name,
+            Delete={'Objects': [{'Key': key} for key in uploaded], 'Quiet': True}
+        )
+        print(f"   ✅ Test files cleaned up")
         
     except Exception as e:
         print(f"   ❌ Upload test failed: {e}")
@@ -7,7 +7,34 @@ Tests the scheduler's email notification logic without running the actual pipeli
 import sys
 import os
 import json
+import getpass
+import subprocess
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+# Per-user crontab spool files (macOS, Debian/Ubuntu, RHEL); usually readable only by root
+CRONTAB_SPOOL_DIRS = ['/var/at/tabs', '/var/spool/cron/crontabs', '/var/spool/cron']
+
+
+@lru_cache(maxsize=1)
+def _read_crontab() -> Optional[str]:
+    """Return the current user's crontab, read from the spool file when permitted.
+    
+    Falls back to `crontab -l`; the result is cached so repeated checks reuse it.
+    Returns None when no crontab can be read.
+    """
+    user = getpass.getuser()
+    for spool_dir in CRONTAB_SPOOL_DIRS:
+        try:
+            return (Path(spool_dir) / user).read_text()
+        except OSError:
+            continue
+    
+    result = subprocess.run(['crontab', '-l'], capture_output=True, text=True)
+    return result.stdout if result.returncode == 0 else None
+
 
 # Mock the email notifier for testing
 class MockPipelineEmailNotifier:
@@ -124,12 +151,9 @@ def test_cron_job_status():
     print("-" * 40)
     
     try:
-        import subprocess
-        result = subprocess.run(['crontab', '-l'], capture_output=True, text=True)
+        cron_content = _read_crontab()
         
-        if result.returncode == 0:
-            cron_content = result.stdout
-            
+        if cron_content is not None:
             # Check for the OHLCV pipeline cron job
             has_pipeline_job = 'schedule_incremental_pipeline.sh' in cron_content
             has_saturday_schedule = '0 7 * * 6' in cron_content
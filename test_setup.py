@@ -15,8 +15,39 @@ Run this script before executing the main pipeline to ensure everything is confi
 import json
 import sys
 import os
+from functools import lru_cache
 from typing import Dict, Any
 
+# Third-party packages are imported once here; test_imports reports any that are missing
+try:
+    import snowflake.connector
+except ImportError:
+    snowflake = None
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError, NoCredentialsError
+except ImportError:
+    boto3 = None
+
+
+@lru_cache(maxsize=1)
+def _get_s3_client():
+    """S3 client shared by every check in this run."""
+    return boto3.client('s3')
+
+
+@lru_cache(maxsize=1)
+def _get_http_session() -> 'requests.Session':
+    """HTTP session shared by every check in this run, so connections are reused."""
+    return requests.Session()
+
+
 def test_imports():
     """Test if all required packages can be imported."""
     print("Testing package imports...")
@@ -68,9 +99,11 @@ def test_snowflake_connection():
     """Test Snowflake connection."""
     print("Testing Snowflake connection...")
     
+    if snowflake is None:
+        print("  ✗ snowflake-connector-python is not installed")
+        return False
+    
     try:
-        import snowflake.connector
-        
         # Try to connect using the DEMO_PRAJAGOPAL connection
         conn = snowflake.connector.connect(
             connection_name='DEMO_PRAJAGOPAL'
@@ -95,15 +128,12 @@ def test_s3_access():
     """Test AWS S3 access."""
     print("Testing AWS S3 access...")
     
-    try:
-        import boto3
-        from botocore.exceptions import ClientError, NoCredentialsError
-    except ImportError as e:
-        print(f"  ✗ Failed to import boto3: {e}")
+    if boto3 is None:
+        print("  ✗ Failed to import boto3")
         return False
     
     try:
-        s3_client = boto3.client('s3')
+        s3_client = _get_s3_client()
         bucket_name = 'sp500-top-10-sector-leaders-ohlcv-s3bkt'
         
         # Test bucket access
@@ -132,9 +162,11 @@ def test_polygon_api():
     """Test Polygon.io API connectivity."""
     print("Testing Polygon.io API...")
     
+    if requests is None:
+        print("  ✗ requests is not installed")
+        return False
+    
     try:
-        import requests
-        
         api_key = os.getenv('POLYGON_API_KEY')
         if not api_key:
             print("  ✗ POLYGON_API_KEY environment variable not set")
@@ -147,7 +179,7 @@ def test_polygon_api():
             'limit': 1
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = _get_http_session().get(url, params=params, timeout=10)
         response.raise_for_status()
         
         data = response.json()
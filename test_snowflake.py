@@ -3,67 +3,74 @@
 Focused test for Snowflake connectivity and ticker retrieval.
 """
 
-import snowflake.connector
 import sys
 
+from snowflake_client import buffered_output, flush_output, get_conn
+
 def test_snowflake_connection():
     """Test Snowflake connection and ticker retrieval."""
-    print("=" * 60)
-    print("SNOWFLAKE CONNECTION AND TICKER RETRIEVAL TEST")
-    print("=" * 60)
+    out, emit = buffered_output()  # written once per section by flush_output
+    
+    emit("=" * 60)
+    emit("SNOWFLAKE CONNECTION AND TICKER RETRIEVAL TEST")
+    emit("=" * 60)
     
     try:
         # Connect to Snowflake
-        print("1. Connecting to Snowflake...")
-        conn = snowflake.connector.connect(
-            connection_name='DEMO_PRAJAGOPAL'
-        )
-        print("   ✓ Connection successful")
+        emit("1. Connecting to Snowflake...")
+        flush_output(out)
+        conn = get_conn()  # shared process-wide connection, closed at exit
+        emit("   ✓ Connection successful")
         
         # Test basic query
-        print("\n2. Testing basic query...")
+        emit("\n2. Testing basic query...")
+        flush_output(out)
         cursor = conn.cursor()
         cursor.execute("SELECT CURRENT_VERSION(), CURRENT_USER(), CURRENT_DATABASE()")
         result = cursor.fetchone()
-        print(f"   ✓ Snowflake version: {result[0]}")
-        print(f"   ✓ Current user: {result[1]}")
-        print(f"   ✓ Current database: {result[2]}")
+        emit(f"   ✓ Snowflake version: {result[0]}")
+        emit(f"   ✓ Current user: {result[1]}")
+        emit(f"   ✓ Current database: {result[2]}")
         
         # Test ticker table access
-        print("\n3. Testing ticker table access...")
+        emit("\n3. Testing ticker table access...")
         query = "SELECT TICKER FROM DEMODB.EQUITY_RESEARCH.SP_SECTOR_COMPANIES LIMIT 10"
-        print(f"   Query: {query}")
+        emit(f"   Query: {query}")
+        flush_output(out)
         
         cursor.execute(query)
         tickers = cursor.fetchall()
         
-        print(f"   ✓ Successfully retrieved {len(tickers)} sample tickers:")
+        emit(f"   ✓ Successfully retrieved {len(tickers)} sample tickers:")
         for i, ticker in enumerate(tickers, 1):
-            print(f"      {i}. {ticker[0]}")
+            emit(f"      {i}. {ticker[0]}")
         
         # Get total count
-        print("\n4. Getting total ticker count...")
+        emit("\n4. Getting total ticker count...")
+        flush_output(out)
         cursor.execute("SELECT COUNT(*) FROM DEMODB.EQUITY_RESEARCH.SP_SECTOR_COMPANIES")
         total_count = cursor.fetchone()[0]
-        print(f"   ✓ Total tickers available: {total_count}")
+        emit(f"   ✓ Total tickers available: {total_count}")
         
         cursor.close()
-        conn.close()
         
-        print(f"\n{'='*60}")
-        print("✅ SNOWFLAKE TEST SUCCESSFUL")
-        print(f"{'='*60}")
-        print(f"✓ Connection established with PAT authentication")
-        print(f"✓ Database access confirmed")
-        print(f"✓ Ticker table accessible")
-        print(f"✓ {total_count} tickers available for processing")
+        emit(f"\n{'='*60}")
+        emit("✅ SNOWFLAKE TEST SUCCESSFUL")
+        emit(f"{'='*60}")
+        emit(f"✓ Connection established with PAT authentication")
+        emit(f"✓ Database access confirmed")
+        emit(f"✓ Ticker table accessible")
+        emit(f"✓ {total_count} tickers available for processing")
         
         return True
         
     except Exception as e:
-        print(f"\n❌ SNOWFLAKE TEST FAILED")
-        print(f"Error: {e}")
+        emit(f"\n❌ SNOWFLAKE TEST FAILED")
+        emit(f"Error: {e}")
         return False
+    
+    finally:
+        flush_output(out)
 
 def main():
     """Main test function."""
@@ -3,104 +3,113 @@
 Complete test for Snowflake integration with ticker retrieval.
 """
 
-import snowflake.connector
 import sys
 
+import pyarrow.compute as pc
+
+from snowflake_client import buffered_output, flush_output, get_conn
+
 def test_complete_snowflake_integration():
     """Test complete Snowflake integration including ticker retrieval."""
-    print("=" * 70)
-    print("COMPLETE SNOWFLAKE INTEGRATION TEST")
-    print("=" * 70)
+    out, emit = buffered_output()  # written once per section by flush_output
+    
+    emit("=" * 70)
+    emit("COMPLETE SNOWFLAKE INTEGRATION TEST")
+    emit("=" * 70)
     
     try:
         # Connect to Snowflake
-        print("1. Establishing Snowflake connection...")
-        conn = snowflake.connector.connect(
-            connection_name='DEMO_PRAJAGOPAL'
-        )
+        emit("1. Establishing Snowflake connection...")
+        flush_output(out)
+        conn = get_conn()  # shared process-wide connection, closed at exit
         cursor = conn.cursor()
-        print("   ✅ Connection successful with PAT authentication")
+        emit("   ✅ Connection successful with PAT authentication")
         
         # Get connection details
-        print("\n2. Verifying connection details...")
+        emit("\n2. Verifying connection details...")
+        flush_output(out)
         cursor.execute("SELECT CURRENT_VERSION(), CURRENT_USER(), CURRENT_DATABASE(), CURRENT_SCHEMA()")
         result = cursor.fetchone()
-        print(f"   ✅ Snowflake version: {result[0]}")
-        print(f"   ✅ Current user: {result[1]}")
-        print(f"   ✅ Current database: {result[2]}")
-        print(f"   ✅ Current schema: {result[3]}")
+        emit(f"   ✅ Snowflake version: {result[0]}")
+        emit(f"   ✅ Current user: {result[1]}")
+        emit(f"   ✅ Current database: {result[2]}")
+        emit(f"   ✅ Current schema: {result[3]}")
         
-        # Test the exact query from the pipeline
-        print("\n3. Testing ticker retrieval query...")
-        query = "SELECT TICKER_SYMBOL FROM DEMODB.EQUITY_RESEARCH.SP_SECTOR_COMPANIES"
-        print(f"   Query: {query}")
+        # Test the pipeline's ticker query; SP_SECTOR rides along so the sector breakdown needs no second query
+        emit("\n3. Testing ticker retrieval query...")
+        query = "SELECT TICKER_SYMBOL, SP_SECTOR FROM DEMODB.EQUITY_RESEARCH.SP_SECTOR_COMPANIES"
+        emit(f"   Query: {query}")
+        flush_output(out)
         
         cursor.execute(query)
-        results = cursor.fetchall()
         
-        # Extract ticker symbols (same logic as pipeline)
-        tickers = [row[0] for row in results]
+        # Take the ticker column straight from the Arrow result instead of boxing each row into a tuple
+        ticker_table = cursor.fetch_arrow_all()
+        tickers = ticker_table.column('TICKER_SYMBOL').to_pylist() if ticker_table is not None else []
         
-        print(f"   ✅ Successfully retrieved {len(tickers)} tickers")
+        emit(f"   ✅ Successfully retrieved {len(tickers)} tickers")
         
         # Show sample tickers
-        print(f"\n4. Sample tickers (first 10):")
+        emit(f"\n4. Sample tickers (first 10):")
         for i, ticker in enumerate(tickers[:10], 1):
-            print(f"      {i:2d}. {ticker}")
+            emit(f"      {i:2d}. {ticker}")
         
         # Show ticker distribution by sector
-        print(f"\n5. Analyzing ticker distribution by sector...")
-        cursor.execute("""
-            SELECT SP_SECTOR, COUNT(*) as ticker_count 
-            FROM DEMODB.EQUITY_RESEARCH.SP_SECTOR_COMPANIES 
-            GROUP BY SP_SECTOR 
-            ORDER BY ticker_count DESC
-        """)
-        sectors = cursor.fetchall()
-        
-        print("   Sector distribution:")
+        emit(f"\n5. Analyzing ticker distribution by sector...")
+        sectors = []
+        if ticker_table is not None:
+            sector_counts = ticker_table.group_by('SP_SECTOR').aggregate(
+                [('SP_SECTOR', 'count', pc.CountOptions(mode='all'))]
+            ).sort_by([('SP_SECTOR_count', 'descending')])
+            sectors = list(zip(sector_counts.column('SP_SECTOR').to_pylist(),
+                               sector_counts.column('SP_SECTOR_count').to_pylist()))
+        
+        emit("   Sector distribution:")
         for sector, count in sectors:
-            print(f"      {sector}: {count} tickers")
+            emit(f"      {sector}: {count} tickers")
         
         # Test a few specific tickers that should exist
-        print(f"\n6. Verifying presence of expected major tickers...")
+        emit(f"\n6. Verifying presence of expected major tickers...")
         expected_tickers = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA']
         found_tickers = []
         missing_tickers = []
+        ticker_set = frozenset(tickers)  # O(1) membership checks
         
         for expected in expected_tickers:
-            if expected in tickers:
+            if expected in ticker_set:
                 found_tickers.append(expected)
-                print(f"      ✅ {expected} - Found")
+                emit(f"      ✅ {expected} - Found")
             else:
                 missing_tickers.append(expected)
-                print(f"      ❌ {expected} - Missing")
+                emit(f"      ❌ {expected} - Missing")
         
         # Summary
-        print(f"\n{'='*70}")
-        print("📊 INTEGRATION TEST SUMMARY")
-        print(f"{'='*70}")
-        print(f"✅ Connection: Successful (PAT authentication)")
-        print(f"✅ Database access: DEMODB.EQUITY_RESEARCH.SP_SECTOR_COMPANIES")
-        print(f"✅ Total tickers available: {len(tickers)}")
-        print(f"✅ Sectors covered: {len(sectors)}")
-        print(f"✅ Expected tickers found: {len(found_tickers)}/{len(expected_tickers)}")
+        emit(f"\n{'='*70}")
+        emit("📊 INTEGRATION TEST SUMMARY")
+        emit(f"{'='*70}")
+        emit(f"✅ Connection: Successful (PAT authentication)")
+        emit(f"✅ Database access: DEMODB.EQUITY_RESEARCH.SP_SECTOR_COMPANIES")
+        emit(f"✅ Total tickers available: {len(tickers)}")
+        emit(f"✅ Sectors covered: {len(sectors)}")
+        emit(f"✅ Expected tickers found: {len(found_tickers)}/{len(expected_tickers)}")
         
         if missing_tickers:
-            print(f"⚠️  Missing expected tickers: {', '.join(missing_tickers)}")
+            emit(f"⚠️  Missing expected tickers: {', '.join(missing_tickers)}")
         
         cursor.close()
-        conn.close()
         
-        print(f"\n🎉 SNOWFLAKE INTEGRATION FULLY OPERATIONAL!")
-        print(f"The pipeline can now retrieve {len(tickers)} tickers for processing.")
+        emit(f"\n🎉 SNOWFLAKE INTEGRATION FULLY OPERATIONAL!")
+        emit(f"The pipeline can now retrieve {len(tickers)} tickers for processing.")
         
         return True, tickers
         
     except Exception as e:
-        print(f"\n❌ SNOWFLAKE INTEGRATION TEST FAILED")
-        print(f"Error: {e}")
+        emit(f"\n❌ SNOWFLAKE INTEGRATION TEST FAILED")
+        emit(f"Error: {e}")
         return False, []
+    
+    finally:
+        flush_output(out)
 
 def main():
     """Main test function."""
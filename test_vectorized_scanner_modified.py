@@ -4,71 +4,141 @@ Modified Snowflake Vectorized Scanner Performance Test
 Tests COPY INTO command performance with different configurations based on Snowflake constraints.
 """
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import argparse
 import snowflake.connector
+from snowflake.connector.errors import NotSupportedError
+from concurrent.futures import ThreadPoolExecutor
+import atexit
 import logging
+import logging.handlers
+import queue
+import random
 import time
 import sys
-from datetime import datetime
-from typing import Dict, Any
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+try:
+    from scipy.stats import mannwhitneyu
+except ImportError:  # optional; the matrix comparison skips the significance test without it
+    mannwhitneyu = None
+
+# Configure logging: records are queued and written by a background listener
+# thread so file/console I/O stays out of the timed COPY sections
+_log_queue = queue.Queue(-1)
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_file_handler = logging.FileHandler('vectorized_scanner_modified_test.log')
+_log_file_handler.setFormatter(_log_formatter)
+_log_stream_handler = logging.StreamHandler(sys.stdout)
+_log_stream_handler.setFormatter(_log_formatter)
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_file_handler, _log_stream_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# The queue handler only passes the message through; the listener's handlers format it
+_log_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_log_queue_handler.setFormatter(logging.Formatter('%(message)s'))
 
-# Configure logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('vectorized_scanner_modified_test.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
+    handlers=[_log_queue_handler]
 )
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class CopyConfig:
+    """One COPY INTO configuration; phases differ only in these options."""
+    vectorized: bool
+    load_mode: Optional[str] = None
+    on_error: Optional[str] = None
+    purge: bool = False
+    force: bool = False
+    match_by_column_name: str = 'CASE_SENSITIVE'
+    
+    @property
+    def setting(self) -> str:
+        """USE_VECTORIZED_SCANNER value, which also keys the phase results."""
+        return 'TRUE' if self.vectorized else 'FALSE'
+    
+    def render(self, target_table: str, files: Optional[Sequence[str]] = None) -> str:
+        """Return the COPY INTO statement, optionally restricted to the given stage files."""
+        clauses = [f"COPY INTO {target_table}", "  FROM @SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG"]
+        if files:
+            clauses.append("  FILES = (" + ', '.join(f"'{name}'" for name in files) + ")")
+        clauses += [
+            "  FILE_FORMAT = (",
+            "     FORMAT_NAME = 'SP500_TOP10_SECTOR_OHLCV_FILE_FORMAT'",
+            f"     USE_VECTORIZED_SCANNER = {self.setting}",
+            "  )"
+        ]
+        if self.load_mode:
+            clauses.append(f"  LOAD_MODE = {self.load_mode}")
+        if self.on_error:
+            clauses.append(f"  ON_ERROR = {self.on_error}")
+        clauses += [
+            f"  PURGE = {str(self.purge).upper()}",
+            f"  MATCH_BY_COLUMN_NAME = {self.match_by_column_name}",
+            f"  FORCE = {str(self.force).upper()};"
+        ]
+        return '\n'.join(clauses)
+
+
 class ModifiedVectorizedScannerTest:
     """
     Modified class to test Snowflake COPY INTO performance with vectorized scanner settings.
     Adapts to Snowflake's constraint that LOAD_MODE = ADD_FILES_COPY requires USE_VECTORIZED_SCANNER = TRUE.
     """
     
-    def __init__(self):
-        """Initialize the test."""
+    # Snowflake accepts at most 1,000 names in a COPY FILES list
+    MAX_FILES_PER_COPY = 1000
+    # How often an asynchronously submitted COPY is checked for completion
+    ASYNC_POLL_SECONDS = 0.1
+    
+    def __init__(self, shard_workers: int = 1):
+        """Initialize the test; shard_workers > 1 loads each phase with sharded concurrent COPYs."""
         self.conn = None
         self.cursor = None
+        self.shard_workers = shard_workers
+        self.query_tag = f"vecscanner_bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.target_table = 'sp500_top10_sector_ohlcv_itbl'
+        self._stage_file_count_cache = None  # reused across runs on this instance
         
-        # COPY INTO command for USE_VECTORIZED_SCANNER = FALSE (without ADD_FILES_COPY)
-        self.copy_command_false = """
-        COPY INTO sp500_top10_sector_ohlcv_itbl
-          FROM @SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG
-          FILE_FORMAT = (
-             FORMAT_NAME = 'SP500_TOP10_SECTOR_OHLCV_FILE_FORMAT'
-             USE_VECTORIZED_SCANNER = FALSE
-          )
-          PURGE = FALSE
-          MATCH_BY_COLUMN_NAME = CASE_SENSITIVE
-          FORCE = FALSE;
-        """
+        # Each phase loads its own transient copy of the target table so both can run at once
+        self.phase_tables = {
+            'FALSE': 'sp500_top10_sector_ohlcv_itbl_false',
+            'TRUE': 'sp500_top10_sector_ohlcv_itbl_true'
+        }
         
-        # COPY INTO command for USE_VECTORIZED_SCANNER = TRUE (with ADD_FILES_COPY)
-        self.copy_command_true = """
-        COPY INTO sp500_top10_sector_ohlcv_itbl
-          FROM @SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG
-          FILE_FORMAT = (
-             FORMAT_NAME = 'SP500_TOP10_SECTOR_OHLCV_FILE_FORMAT'
-             USE_VECTORIZED_SCANNER = TRUE
-          )
-          LOAD_MODE = ADD_FILES_COPY
-          PURGE = FALSE
-          MATCH_BY_COLUMN_NAME = CASE_SENSITIVE
-          FORCE = FALSE;
-        """
+        # FALSE runs the standard COPY; LOAD_MODE = ADD_FILES_COPY requires the vectorized scanner
+        self.copy_configs = {
+            config.setting: config for config in (
+                CopyConfig(vectorized=False),
+                CopyConfig(vectorized=True, load_mode='ADD_FILES_COPY')
+            )
+        }
         
         logger.info("Modified Vectorized Scanner Test initialized")
     
+    def _open_session(self) -> snowflake.connector.SnowflakeConnection:
+        """Open a benchmark session: explicit commits, no result-cache reuse, tagged queries."""
+        return snowflake.connector.connect(
+            connection_name='DEMO_PRAJAGOPAL',
+            autocommit=False,
+            session_parameters={
+                'USE_CACHED_RESULT': False,
+                'QUERY_TAG': self.query_tag
+            }
+        )
+    
     def _connect_to_snowflake(self) -> bool:
         """Establish connection to Snowflake."""
         try:
-            self.conn = snowflake.connector.connect(
-                connection_name='DEMO_PRAJAGOPAL'
-            )
+            self.conn = self._open_session()
             self.cursor = self.conn.cursor()
             logger.info("Successfully connected to Snowflake")
             return True
@@ -87,72 +157,311 @@ class ModifiedVectorizedScannerTest:
         except Exception as e:
             logger.error(f"Error closing Snowflake connection: {e}")
     
-    def _get_table_row_count(self) -> int:
-        """Get current row count in the target table."""
+    def _warmup(self):
+        """Resume the warehouse and touch the stage so neither phase pays cold-start costs."""
         try:
-            self.cursor.execute("SELECT COUNT(*) FROM sp500_top10_sector_ohlcv_itbl")
-            result = self.cursor.fetchone()
-            count = result[0] if result else 0
-            logger.info(f"Current table row count: {count:,}")
-            return count
+            self.cursor.execute("SELECT CURRENT_WAREHOUSE()")
+            warehouse = self.cursor.fetchone()[0]
+            if warehouse:
+                try:
+                    self.cursor.execute(f"ALTER WAREHOUSE IF EXISTS {warehouse} RESUME IF SUSPENDED")
+                except snowflake.connector.errors.ProgrammingError as e:
+                    logger.warning(f"Could not resume warehouse {warehouse}: {e}")
+            
+            self.cursor.execute("DESCRIBE STAGE SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG")
+            self.cursor.fetchall()
+            self.cursor.execute("SELECT 1")
+            self.cursor.fetchall()
+            logger.info(f"Warehouse {warehouse} and stage metadata warmed up")
         except Exception as e:
-            logger.error(f"Failed to get table row count: {e}")
-            return -1
+            logger.warning(f"Warm-up failed: {e}")
     
-    def _get_stage_file_count(self) -> int:
-        """Get count of files in the stage."""
+    def _get_stage_file_count(self, verbose: bool = False, force: bool = False) -> int:
+        """Get count of files in the stage.
+        
+        Counts server-side through the stage's directory table so only a scalar comes back;
+        falls back to LIST when the stage has no directory table (or it has not been refreshed).
+        The count is cached on the instance; pass force=True to recount.
+        """
+        if self._stage_file_count_cache is not None and not force and not verbose:
+            logger.info(f"Files in stage: {self._stage_file_count_cache} (cached)")
+            return self._stage_file_count_cache
+        
         try:
-            self.cursor.execute("LIST @SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG")
-            results = self.cursor.fetchall()
-            file_count = len(results)
+            file_count = 0
+            try:
+                self.cursor.execute("SELECT COUNT(*) FROM DIRECTORY(@SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG)")
+                file_count = self.cursor.fetchone()[0]
+            except snowflake.connector.errors.ProgrammingError as e:
+                logger.info(f"Stage directory table unavailable, listing stage instead: {e}")
+            
+            if file_count:
+                sample = []
+                if verbose:
+                    self.cursor.execute("SELECT RELATIVE_PATH FROM DIRECTORY(@SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG) LIMIT 5")
+                    sample = [row[0] for row in self.cursor.fetchall()]
+            else:
+                self.cursor.execute("LIST @SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG")
+                results = self.cursor.fetchall()
+                file_count = len(results)
+                sample = [row[0] for row in results[:5]] if verbose else []
+            
             logger.info(f"Files in stage: {file_count}")
+            self._stage_file_count_cache = file_count
             
             # Show sample files
-            if results:
-                logger.info("Sample files in stage:")
-                for i, row in enumerate(results[:5]):
-                    logger.info(f"  {i+1}. {row[0]}")
-                if len(results) > 5:
-                    logger.info(f"  ... and {len(results) - 5} more files")
+            if sample:
+                lines = [f"  {i+1}. {name}" for i, name in enumerate(sample)]
+                if file_count > len(sample):
+                    lines.append(f"  ... and {file_count - len(sample)} more files")
+                logger.info("Sample files in stage:\n%s", '\n'.join(lines))
             
             return file_count
         except Exception as e:
             logger.error(f"Failed to list stage files: {e}")
             return -1
     
-    def _truncate_table(self) -> bool:
-        """Truncate the target table to prepare for fresh load."""
+    def _run_phase(self, vectorized_setting: str) -> Dict[str, Any]:
+        """Run one phase on its own Snowflake session so the FALSE and TRUE phases can overlap."""
+        if self.shard_workers > 1:
+            return self._shard_copy(vectorized_setting, self.shard_workers)
+        
         try:
-            logger.info("Truncating target table...")
-            self.cursor.execute("TRUNCATE TABLE sp500_top10_sector_ohlcv_itbl")
-            logger.info("Table truncated successfully")
-            return True
+            conn = self._open_session()
         except Exception as e:
-            logger.error(f"Failed to truncate table: {e}")
-            return False
+            logger.error(f"Failed to open a session for the {vectorized_setting} phase: {e}")
+            return {
+                'vectorized_setting': vectorized_setting,
+                'execution_time_seconds': -1,
+                'error': str(e),
+                'success': False
+            }
+        
+        table_name = self.phase_tables[vectorized_setting]
+        try:
+            copy_command = self.copy_configs[vectorized_setting].render(table_name)
+            return self._execute_copy_command(vectorized_setting, copy_command, conn)
+        finally:
+            # The transient phase table only exists for the measurement
+            try:
+                conn.cursor().execute(f"DROP TABLE IF EXISTS {table_name}")
+            except Exception as e:
+                logger.error(f"Failed to drop table {table_name}: {e}")
+            conn.close()
     
-    def _execute_copy_command(self, vectorized_setting: str, copy_command: str) -> Dict[str, Any]:
-        """Execute COPY INTO command and measure performance."""
+    @staticmethod
+    def _list_stage_files(cursor) -> list:
+        """Return stage file paths relative to the stage, as COPY's FILES option expects."""
+        try:
+            cursor.execute("SELECT RELATIVE_PATH FROM DIRECTORY(@SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG)")
+            files = [row[0] for row in cursor.fetchall()]
+            if files:
+                return files
+        except snowflake.connector.errors.ProgrammingError as e:
+            logger.info(f"Stage directory table unavailable, listing stage instead: {e}")
+        
+        # LIST returns full URLs (s3://bucket/file) for this external stage; the bucket is flat,
+        # so the last path segment is the stage-relative name
+        cursor.execute("LIST @SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG")
+        list_query_id = cursor.sfqid
+        cursor.execute(
+            f"SELECT SPLIT_PART(\"name\", '/', -1) FROM TABLE(RESULT_SCAN('{list_query_id}')) ORDER BY 1"
+        )
+        return [row[0] for row in cursor.fetchall()]
+    
+    def _run_shard(self, vectorized_setting: str, shard: int, files: list) -> Dict[str, Any]:
+        """COPY one bucket of files into the phase table on its own session."""
+        table_name = self.phase_tables[vectorized_setting]
+        copy_command = self.copy_configs[vectorized_setting].render(table_name, files)
+        
+        conn = self._open_session()
         try:
-            logger.info(f"Executing COPY INTO with USE_VECTORIZED_SCANNER = {vectorized_setting}")
-            logger.info("COPY command:")
-            for line in copy_command.strip().split('\n'):
-                logger.info(f"  {line.strip()}")
+            cursor = conn.cursor()
+            start_time = time.perf_counter()
+            cursor.execute(copy_command)
+            conn.commit()
+            execution_time = time.perf_counter() - start_time
             
-            # Record start time
-            start_time = time.time()
-            start_datetime = datetime.now()
+            copy_table = self._fetch_copy_results(cursor)
+            if 'rows_loaded' in copy_table.column_names:
+                rows_loaded = pc.sum(copy_table['rows_loaded']).as_py() or 0
+            else:
+                rows_loaded = 0
+            
+            return {
+                'shard': shard,
+                'file_count': len(files),
+                'rows_loaded': rows_loaded,
+                'execution_time_seconds': execution_time,
+                'query_id': cursor.sfqid
+            }
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def _shard_copy(self, vectorized_setting: str, n_workers: int = 4) -> Dict[str, Any]:
+        """Load the phase table with concurrent COPYs over disjoint FILES lists, one session each.
+        
+        Returns the summed rows loaded and the wall-clock time of the whole sharded load;
+        the slowest shard's time is reported alongside it.
+        """
+        table_name = self.phase_tables[vectorized_setting]
+        try:
+            conn = self._open_session()
+        except Exception as e:
+            logger.error(f"Failed to open a session for the {vectorized_setting} phase: {e}")
+            return {
+                'vectorized_setting': vectorized_setting,
+                'execution_time_seconds': -1,
+                'error': str(e),
+                'success': False
+            }
+        
+        try:
+            cursor = conn.cursor()
+            files = self._list_stage_files(cursor)
+            if not files:
+                raise RuntimeError("No files found in stage @SP500_TOP_10_SECTOR_LEADERS_OHLCV_STG")
+            cursor.execute(f"CREATE OR REPLACE TRANSIENT TABLE {table_name} LIKE {self.target_table}")
+            
+            # Round-robin into buckets; extra buckets keep each FILES list under the limit
+            n_shards = max(n_workers, -(-len(files) // self.MAX_FILES_PER_COPY))
+            shards = [files[i::n_shards] for i in range(n_shards) if files[i::n_shards]]
+            logger.info(f"Executing sharded COPY INTO {table_name} with USE_VECTORIZED_SCANNER = {vectorized_setting}: "
+                        f"{len(files)} files in {len(shards)} shards, {n_workers} sessions")
             
-            # Execute the COPY command
-            self.cursor.execute(copy_command)
+            start_time = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=n_workers) as executor:
+                shard_results = list(executor.map(
+                    self._run_shard, [vectorized_setting] * len(shards), range(len(shards)), shards
+                ))
+            execution_time = time.perf_counter() - start_time
             
-            # Record end time
-            end_time = time.time()
+            # Wall-clock stamps are derived after the timed section
             end_datetime = datetime.now()
+            start_datetime = end_datetime - timedelta(seconds=execution_time)
+            
+            rows_loaded = sum(result['rows_loaded'] for result in shard_results)
+            slowest_shard = max((result['execution_time_seconds'] for result in shard_results), default=0)
+            
+            # A FILES list that matches nothing still "succeeds" with 0 rows
+            for result in shard_results:
+                if result['rows_loaded'] == 0:
+                    logger.warning(f"Shard {result['shard']} loaded 0 rows from {result['file_count']} files")
+            if rows_loaded == 0:
+                raise RuntimeError(f"Sharded COPY loaded 0 rows from {len(files)} files")
+            
+            logger.info(f"Sharded COPY completed in {execution_time:.2f} seconds "
+                        f"(slowest shard {slowest_shard:.2f} seconds), {rows_loaded:,} rows loaded")
+            
+            return {
+                'vectorized_setting': vectorized_setting,
+                'start_time': start_datetime,
+                'end_time': end_datetime,
+                'execution_time_seconds': execution_time,
+                'execution_time_formatted': f"{execution_time:.2f} seconds",
+                'slowest_shard_seconds': slowest_shard,
+                'shard_results': shard_results,
+                'copy_file_count': len(files),
+                'rows_loaded': rows_loaded,
+                'success': True
+            }
+            
+        except Exception as e:
+            logger.error(f"Failed to execute sharded COPY with {vectorized_setting}: {e}")
+            return {
+                'vectorized_setting': vectorized_setting,
+                'execution_time_seconds': -1,
+                'error': str(e),
+                'success': False
+            }
+        
+        finally:
+            try:
+                conn.cursor().execute(f"DROP TABLE IF EXISTS {table_name}")
+            except Exception as e:
+                logger.error(f"Failed to drop table {table_name}: {e}")
+            conn.close()
+    
+    @staticmethod
+    def _fetch_copy_results(cursor) -> pa.Table:
+        """Fetch COPY status rows as an Arrow table with lower-case column names."""
+        try:
+            table = cursor.fetch_arrow_all()
+        except NotSupportedError:
+            # COPY status may come back in JSON result format; build the table from tuples
+            rows = cursor.fetchall()
+            names = [column[0] for column in cursor.description]
+            table = pa.table({name: [row[i] for row in rows] for i, name in enumerate(names)})
+        if table is None:
+            return pa.table({})
+        return table.rename_columns([name.lower() for name in table.column_names])
+    
+    def _get_query_profile(self, conn, query_id: str) -> Dict[str, Any]:
+        """Look up Snowflake's own timing for a query in its session's query history."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT EXECUTION_TIME, COMPILATION_TIME, BYTES_SCANNED
+                FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY_BY_SESSION())
+                WHERE QUERY_ID = %s
+            """, (query_id,))
+            row = cursor.fetchone()
+            if not row:
+                return {}
+            
+            return {
+                'server_execution_time_ms': row[0] or 0,
+                'compilation_time_ms': row[1] or 0,
+                'bytes_scanned': row[2] or 0
+            }
+        except Exception as e:
+            logger.warning(f"Could not read query history for {query_id}: {e}")
+            return {}
+        finally:
+            cursor.close()
+    
+    def _execute_copy_command(self, vectorized_setting: str, copy_command: str, conn) -> Dict[str, Any]:
+        """Create the phase table and COPY INTO it asynchronously, measuring performance."""
+        table_name = self.phase_tables[vectorized_setting]
+        try:
+            logger.info(f"Executing COPY INTO {table_name} with USE_VECTORIZED_SCANNER = {vectorized_setting}")
+            copy_cursor = conn.cursor()
+            copy_cursor.execute(f"CREATE OR REPLACE TRANSIENT TABLE {table_name} LIKE {self.target_table}")
+            
+            # Record start time
+            start_time = time.perf_counter()
+            
+            # Submit without blocking, and log the command while Snowflake runs it;
+            # one record, so the two concurrent phases' commands do not interleave in the log
+            copy_cursor.execute_async(copy_command)
+            query_id = copy_cursor.sfqid
+            command_text = '\n'.join(f"  {line.strip()}" for line in copy_command.strip().split('\n'))
+            logger.info("COPY command (query %s):\n%s", query_id, command_text)
+            
+            # Raises if the COPY failed; its transaction is committed inside the timing
+            while conn.is_still_running(conn.get_query_status_throw_if_error(query_id)):
+                time.sleep(self.ASYNC_POLL_SECONDS)
+            conn.commit()
+            
+            # Record end time; wall-clock stamps are derived after the timed section
+            end_time = time.perf_counter()
             execution_time = end_time - start_time
+            end_datetime = datetime.now()
+            start_datetime = end_datetime - timedelta(seconds=execution_time)
             
-            # Get results
-            results = self.cursor.fetchall()
+            # Get results of the finished COPY
+            copy_cursor.get_results_from_sfqid(query_id)
+            copy_table = self._fetch_copy_results(copy_cursor)
+            results = copy_table.slice(0, 5).to_pylist()  # small sample for logging/reporting
+            
+            # COPY reports rows_loaded per file; a no-op COPY returns only a status column
+            if 'rows_loaded' in copy_table.column_names:
+                rows_loaded = pc.sum(copy_table['rows_loaded']).as_py() or 0
+            else:
+                rows_loaded = 0
             
             # Parse results (COPY INTO returns status information)
             result_info = {
@@ -162,21 +471,36 @@ class ModifiedVectorizedScannerTest:
                 'execution_time_seconds': execution_time,
                 'execution_time_formatted': f"{execution_time:.2f} seconds",
                 'copy_results': results,
+                'copy_file_count': copy_table.num_rows,
+                'rows_loaded': rows_loaded,
+                'query_id': query_id,
                 'success': True
             }
             
+            # Snowflake's own timing for the COPY (the wall-clock time is at polling resolution)
+            result_info.update(self._get_query_profile(conn, query_id))
+            
             # Log results
             logger.info(f"COPY command completed in {execution_time:.2f} seconds")
+            if 'server_execution_time_ms' in result_info:
+                logger.info(f"Server-side: execution {result_info['server_execution_time_ms']:,} ms, "
+                            f"compilation {result_info['compilation_time_ms']:,} ms, "
+                            f"{result_info['bytes_scanned']:,} bytes scanned")
             if results:
-                total_rows = sum(row[2] for row in results if len(row) > 2)  # Sum rows_loaded
-                logger.info(f"Total rows loaded: {total_rows:,}")
-                for result in results:
-                    logger.info(f"COPY result: {result}")
+                logger.info(f"Total rows loaded: {rows_loaded:,}")
+                lines = [f"  {result}" for result in results]
+                if copy_table.num_rows > len(results):
+                    lines.append(f"  ... and {copy_table.num_rows - len(results)} more files")
+                logger.info("COPY results (%d files):\n%s", copy_table.num_rows, '\n'.join(lines))
             
             return result_info
             
         except Exception as e:
             logger.error(f"Failed to execute COPY command with {vectorized_setting}: {e}")
+            try:
+                conn.rollback()
+            except Exception as rollback_error:
+                logger.error(f"Failed to roll back the {vectorized_setting} phase: {rollback_error}")
             return {
                 'vectorized_setting': vectorized_setting,
                 'execution_time_seconds': -1,
@@ -184,6 +508,86 @@ class ModifiedVectorizedScannerTest:
                 'success': False
             }
     
+    def _run_phases(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Run the FALSE and TRUE phases concurrently; returns (false_result, true_result)."""
+        # Randomize which phase is submitted first so neither is systematically favored
+        phase_order = list(self.copy_configs)
+        random.shuffle(phase_order)
+        logger.info(f"Phase submission order: {', '.join(phase_order)}")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            phase_results = dict(zip(phase_order, executor.map(self._run_phase, phase_order)))
+        false_result = phase_results['FALSE']
+        true_result = phase_results['TRUE']
+        
+        if false_result['success']:
+            logger.info(f"Rows loaded with FALSE: {false_result['rows_loaded']:,}")
+        if true_result['success']:
+            logger.info(f"Rows loaded with TRUE: {true_result['rows_loaded']:,}")
+        if false_result['success'] and true_result['success'] and false_result['rows_loaded'] != true_result['rows_loaded']:
+            logger.warning(f"Row counts differ between phases: FALSE {false_result['rows_loaded']:,}, "
+                           f"TRUE {true_result['rows_loaded']:,}")
+        
+        return false_result, true_result
+    
+    def run_matrix(self, n_iters: int = 5) -> Dict[str, Any]:
+        """Repeat both phases n_iters times after one warm-up and stage count.
+        
+        Each phase still opens its own fresh session on every iteration, so runs stay
+        isolated; only the warm-up and stage count share the main connection.
+        """
+        logger.info("=" * 80)
+        logger.info(f"MODIFIED SNOWFLAKE VECTORIZED SCANNER PERFORMANCE MATRIX ({n_iters} iterations)")
+        logger.info("=" * 80)
+        
+        test_results = {
+            'test_start_time': datetime.now(),
+            'iterations': n_iters,
+            'false_results': [],
+            'true_results': [],
+            'comparison': None
+        }
+        
+        try:
+            if not self._connect_to_snowflake():
+                logger.error("Failed to connect to Snowflake")
+                return test_results
+            self._warmup()
+            
+            if self._get_stage_file_count() <= 0:
+                logger.error("No files found in stage. Please run the data pipeline first.")
+                return test_results
+            
+            for iteration in range(1, n_iters + 1):
+                logger.info(f"Iteration {iteration}/{n_iters}...")
+                false_result, true_result = self._run_phases()
+                test_results['false_results'].append(false_result)
+                test_results['true_results'].append(true_result)
+            
+            test_results['test_end_time'] = datetime.now()
+            
+            # Per-iteration timings, server-side when available
+            lines = []
+            for iteration, (false_result, true_result) in enumerate(
+                    zip(test_results['false_results'], test_results['true_results']), 1):
+                times = []
+                for result in (false_result, true_result):
+                    server_ms = result.get('server_execution_time_ms')
+                    times.append(f"{server_ms / 1000:.2f}s (server)" if server_ms else result.get('execution_time_formatted', 'FAILED'))
+                lines.append(f"  Iteration {iteration}: FALSE {times[0]}, TRUE {times[1]}")
+            logger.info("Matrix results:\n%s", '\n'.join(lines))
+            
+            test_results['comparison'] = self._compare_results(test_results['false_results'], test_results['true_results'])
+            
+            return test_results
+            
+        except Exception as e:
+            logger.error(f"Performance matrix failed: {e}")
+            test_results['error'] = str(e)
+            return test_results
+        
+        finally:
+            self._disconnect_from_snowflake()
+    
     def run_performance_test(self) -> Dict[str, Any]:
         """Run the complete performance test comparing vectorized scanner settings."""
         logger.info("=" * 80)
@@ -206,6 +610,7 @@ class ModifiedVectorizedScannerTest:
             if not self._connect_to_snowflake():
                 logger.error("Failed to connect to Snowflake")
                 return test_results
+            self._warmup()
             
             # Step 2: Check stage files
             logger.info("Step 2: Checking stage files...")
@@ -214,57 +619,21 @@ class ModifiedVectorizedScannerTest:
                 logger.error("No files found in stage. Please run the data pipeline first.")
                 return test_results
             
-            # Step 3: Test with USE_VECTORIZED_SCANNER = FALSE (standard COPY)
-            logger.info("Step 3: Testing with USE_VECTORIZED_SCANNER = FALSE (standard COPY)...")
-            
-            # Truncate table for clean test
-            if not self._truncate_table():
-                logger.error("Failed to truncate table")
-                return test_results
-            
-            # Get initial row count
-            initial_count = self._get_table_row_count()
-            
-            # Execute COPY with vectorized scanner FALSE
-            false_result = self._execute_copy_command('FALSE', self.copy_command_false)
+            # Step 3: Run both phases concurrently, each on its own session and table
+            logger.info("Step 3: Testing USE_VECTORIZED_SCANNER = FALSE (standard COPY) and TRUE (optimized COPY) concurrently...")
+            false_result, true_result = self._run_phases()
             test_results['false_result'] = false_result
-            
-            if false_result['success']:
-                # Get row count after load
-                false_final_count = self._get_table_row_count()
-                false_result['rows_loaded'] = false_final_count - initial_count
-                logger.info(f"Rows loaded with FALSE: {false_result['rows_loaded']:,}")
-            
-            # Step 4: Test with USE_VECTORIZED_SCANNER = TRUE (optimized COPY)
-            logger.info("Step 4: Testing with USE_VECTORIZED_SCANNER = TRUE (optimized COPY)...")
-            
-            # Truncate table for clean test
-            if not self._truncate_table():
-                logger.error("Failed to truncate table for second test")
-                return test_results
-            
-            # Get initial row count
-            initial_count = self._get_table_row_count()
-            
-            # Execute COPY with vectorized scanner TRUE
-            true_result = self._execute_copy_command('TRUE', self.copy_command_true)
             test_results['true_result'] = true_result
             
-            if true_result['success']:
-                # Get row count after load
-                true_final_count = self._get_table_row_count()
-                true_result['rows_loaded'] = true_final_count - initial_count
-                logger.info(f"Rows loaded with TRUE: {true_result['rows_loaded']:,}")
-            
-            # Step 5: Compare results
-            logger.info("Step 5: Comparing results...")
+            # Step 4: Compare results
+            logger.info("Step 4: Comparing results...")
             if false_result['success'] and true_result['success']:
-                comparison = self._compare_results(false_result, true_result)
+                comparison = self._compare_results([false_result], [true_result])
                 test_results['comparison'] = comparison
             
             test_results['test_end_time'] = datetime.now()
             
-            # Step 6: Generate summary report
+            # Step 5: Generate summary report
             self._generate_summary_report(test_results)
             
             return test_results
@@ -277,16 +646,36 @@ class ModifiedVectorizedScannerTest:
         finally:
             self._disconnect_from_snowflake()
     
-    def _compare_results(self, false_result: Dict[str, Any], true_result: Dict[str, Any]) -> Dict[str, Any]:
-        """Compare the performance results."""
-        false_time = false_result['execution_time_seconds']
-        true_time = true_result['execution_time_seconds']
+    def _compare_results(self, false_results: List[Dict[str, Any]], true_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Compare the performance results over one or more runs of each phase.
+        
+        Uses Snowflake's server-side COPY execution time when every run has it;
+        otherwise falls back to client wall-clock time. Phases are compared on their median.
+        """
+        false_results = [result for result in false_results if result['success']]
+        true_results = [result for result in true_results if result['success']]
+        if not false_results or not true_results:
+            logger.error("Cannot compare results due to execution failures")
+            return {'error': 'Cannot compare due to execution failures'}
+        
+        if all(result.get('server_execution_time_ms') for result in false_results + true_results):
+            timing_basis = 'server execution time'
+            false_times = np.asarray([result['server_execution_time_ms'] for result in false_results], dtype=np.float64) / 1000
+            true_times = np.asarray([result['server_execution_time_ms'] for result in true_results], dtype=np.float64) / 1000
+        else:
+            timing_basis = 'client wall-clock time'
+            false_times = np.asarray([result['execution_time_seconds'] for result in false_results], dtype=np.float64)
+            true_times = np.asarray([result['execution_time_seconds'] for result in true_results], dtype=np.float64)
+        
+        false_time = float(np.median(false_times))
+        true_time = float(np.median(true_times))
         
         if false_time > 0 and true_time > 0:
             time_difference = false_time - true_time
             percent_improvement = ((false_time - true_time) / false_time) * 100
             
             comparison = {
+                'timing_basis': timing_basis,
                 'false_time': false_time,
                 'true_time': true_time,
                 'time_difference_seconds': time_difference,
@@ -294,9 +683,27 @@ class ModifiedVectorizedScannerTest:
                 'faster_setting': 'TRUE' if true_time < false_time else 'FALSE'
             }
             
-            logger.info(f"Performance comparison:")
-            logger.info(f"  FALSE (standard): {false_time:.2f} seconds")
-            logger.info(f"  TRUE (optimized): {true_time:.2f} seconds")
+            logger.info(f"Performance comparison ({timing_basis}):")
+            if len(false_times) > 1 and len(true_times) > 1:
+                for setting, times in (('false', false_times), ('true', true_times)):
+                    p5, p50, p95 = np.percentile(times, [5, 50, 95])
+                    comparison[f'{setting}_stats'] = {
+                        'runs': len(times),
+                        'median': float(p50),
+                        'std': float(np.std(times, ddof=1)),
+                        'p5': float(p5),
+                        'p95': float(p95)
+                    }
+                for label, stats in (('FALSE (standard):', comparison['false_stats']),
+                                     ('TRUE (optimized):', comparison['true_stats'])):
+                    logger.info(f"  {label} median {stats['median']:.2f} seconds, std {stats['std']:.2f}, "
+                                f"p5-p95 {stats['p5']:.2f}-{stats['p95']:.2f} ({stats['runs']} runs)")
+                if mannwhitneyu is not None:
+                    comparison['p_value'] = float(mannwhitneyu(false_times, true_times, alternative='two-sided').pvalue)
+                    logger.info(f"  Mann-Whitney U p-value: {comparison['p_value']:.4f}")
+            else:
+                logger.info(f"  FALSE (standard): {false_time:.2f} seconds")
+                logger.info(f"  TRUE (optimized): {true_time:.2f} seconds")
             logger.info(f"  Difference: {time_difference:.2f} seconds")
             logger.info(f"  Improvement: {percent_improvement:.1f}%")
             logger.info(f"  Faster setting: USE_VECTORIZED_SCANNER = {comparison['faster_setting']}")
@@ -324,8 +731,12 @@ class ModifiedVectorizedScannerTest:
         if false_result and true_result:
             logger.info("")
             logger.info("PERFORMANCE RESULTS:")
-            logger.info(f"  USE_VECTORIZED_SCANNER = FALSE (standard): {false_result.get('execution_time_formatted', 'FAILED')}")
-            logger.info(f"  USE_VECTORIZED_SCANNER = TRUE (optimized):  {true_result.get('execution_time_formatted', 'FAILED')}")
+            for label, result in (('FALSE (standard):', false_result), ('TRUE (optimized): ', true_result)):
+                server_ms = result.get('server_execution_time_ms')
+                server_text = f" (server execution: {server_ms / 1000:.2f} seconds)" if server_ms else ""
+                logger.info(f"  USE_VECTORIZED_SCANNER = {label} {result.get('execution_time_formatted', 'FAILED')}{server_text}")
+            if comparison and 'timing_basis' in comparison:
+                logger.info(f"  Compared on: {comparison['timing_basis']}")
             
             if comparison and 'percent_improvement' in comparison:
                 improvement = comparison['percent_improvement']
@@ -362,8 +773,27 @@ class ModifiedVectorizedScannerTest:
 
 def main():
     """Main entry point."""
+    parser = argparse.ArgumentParser(description="Modified vectorized scanner performance test")
+    parser.add_argument('--iterations', type=int, default=1,
+                        help="repeat both phases this many times after a single warm-up; each phase "
+                             "uses a fresh session (default 1)")
+    parser.add_argument('--shards', type=int, default=1,
+                        help="load each phase with this many concurrent COPY sessions over disjoint "
+                             "FILES lists, for large stages (default 1: single COPY)")
+    args = parser.parse_args()
+    
     try:
-        test = ModifiedVectorizedScannerTest()
+        test = ModifiedVectorizedScannerTest(shard_workers=args.shards)
+        
+        if args.iterations > 1:
+            results = test.run_matrix(args.iterations)
+            if results['true_results'] and all(result['success'] for result in results['true_results']):
+                logger.info("Performance matrix completed successfully")
+                sys.exit(0)
+            else:
+                logger.error("Performance matrix failed or incomplete")
+                sys.exit(1)
+        
         results = test.run_performance_test()
         
         if results.get('comparison') or (results.get('true_result') and results['true_result']['success']):
@@ -2,37 +2,77 @@
 """
 Vectorized Scanner Test Pipeline
 Downloads OHLCV data from Aug 1, 2023 to Aug 29, 2025 for all 110 tickers
-and stores them as flat Parquet files in S3 for Snowflake VECTORIZED_SCANNER testing.
+and stores them as flat Parquet files (several tickers per file) in S3 for
+Snowflake VECTORIZED_SCANNER testing.
 """
 
+import argparse
+import atexit
+import io
 import json
 import logging
+import logging.handlers
+import queue
+import threading
 import time
-from datetime import datetime, timedelta, timezone
-import pytz
+from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import snowflake.connector
-import requests
-import pandas as pd
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
 
-# Configure logging
+from polygon_client import RateLimiter, build_session
+from snowflake_client import get_conn
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # optional speed-up; stdlib json parses the same payloads
+    _json_loads = json.loads
+
+# Configure logging: records are queued and written by a background listener
+# thread so worker threads never block on file/console I/O
+_log_queue = queue.Queue(-1)
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_file_handler = logging.FileHandler('vectorized_scanner_test_pipeline.log')
+_log_file_handler.setFormatter(_log_formatter)
+_log_stream_handler = logging.StreamHandler(sys.stdout)
+_log_stream_handler.setFormatter(_log_formatter)
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_file_handler, _log_stream_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# The queue handler only passes the message through; the listener's handlers format it
+_log_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_log_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('vectorized_scanner_test_pipeline.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
+    handlers=[_log_queue_handler]
 )
 logger = logging.getLogger(__name__)
 
+# Parquet schema for the uploaded files; timestamps are TIMESTAMP_MICROS for Snowflake compatibility
+PARQUET_SCHEMA = pa.schema([
+    pa.field('TICKER', pa.string()),
+    pa.field('OHLC_DATE', pa.timestamp('us')),
+    pa.field('OPEN_PRICE', pa.float64()),
+    pa.field('HIGH_PRICE', pa.float64()),
+    pa.field('LOW_PRICE', pa.float64()),
+    pa.field('CLOSE_PRICE', pa.float64()),
+    pa.field('TRADING_VOLUME', pa.float64()),
+    pa.field('OHLC_TIMESTAMP', pa.timestamp('us'))  # Microsecond precision
+])
+
 
 class VectorizedScannerTestPipeline:
     """
@@ -41,17 +81,46 @@ class VectorizedScannerTestPipeline:
     Stores files in flat structure (no directories) in S3 bucket.
     """
     
-    def __init__(self):
-        """Initialize the pipeline."""
+    def __init__(self, force: bool = False):
+        """Initialize the pipeline; force=True ignores the completed-ticker checkpoint."""
+        self.force = force
         self.polygon_api_key = self._get_polygon_api_key()
         self.s3_client = None
         self.snowflake_conn = None
         
         # Pipeline constants for vectorized scanner testing
         self.S3_BUCKET = 'sp500-top-10-sector-leaders-ohlcv-s3bkt'
-        self.RATE_LIMIT_DELAY = 12.5  # seconds between API calls
+        self.RATE_LIMIT_DELAY = 12.5  # seconds between API calls, unless X-RateLimit-* headers say otherwise
         self.START_DATE = '2023-08-01'  # Aug 1, 2023
         self.END_DATE = '2025-08-29'    # Aug 29, 2025
+        self.MAX_WORKERS = 8  # concurrent ticker workers; API calls still go through the rate limiter
+        self.UPLOAD_WORKERS = 16  # Parquet write + S3 upload threads, separate from the fetch workers
+        self.TICKERS_PER_FILE = 10  # run() combines this many tickers into each Parquet file
+        self.COMPRESSION = 'zstd'  # Parquet codec for the uploaded files
+        self.COMPRESSION_LEVEL = 3
+        
+        # Parquet parts are far below the 8 MiB multipart threshold and the upload pool already
+        # runs uploads in parallel, so each upload is sent inline rather than on its own thread pool
+        self.transfer_config = TransferConfig(
+            multipart_threshold=8 * 1024 * 1024,
+            multipart_chunksize=8 * 1024 * 1024,
+            use_threads=False
+        )
+        
+        # Shared by all worker threads so concurrent fetches respect the Polygon.io quota
+        self.rate_limiter = RateLimiter(self.RATE_LIMIT_DELAY)
+        
+        # Keep-alive HTTP session sized for the worker pool, with 429/5xx backoff
+        self.session = build_session(pool_maxsize=16, total_retries=5, backoff_factor=0.5)
+        
+        # Local cache of the ticker list so reruns skip the Snowflake round trip
+        self.tickers_cache_file = os.path.join('.cache', 'tickers.json')
+        self.TICKERS_CACHE_TTL = 24 * 3600  # seconds
+        
+        # Part files that reached S3 and the tickers each holds, one JSON object per line,
+        # so a rerun resumes
+        self.checkpoint_file = os.path.join('.cache', 'completed_tickers.jsonl')
+        self._checkpoint_lock = threading.Lock()
         
         # AWS credentials path
         self.aws_credentials_dir = '/Users/prajagopal/.aws'
@@ -71,22 +140,29 @@ class VectorizedScannerTestPipeline:
         return api_key
     
     def _connect_to_snowflake(self) -> snowflake.connector.SnowflakeConnection:
-        """Establish connection to Snowflake using the DEMO_PRAJAGOPAL connection."""
+        """Return the shared DEMO_PRAJAGOPAL connection, kept open for the pipeline's lifetime."""
         try:
-            conn = snowflake.connector.connect(
-                connection_name='DEMO_PRAJAGOPAL'
-            )
-            logger.info("Successfully connected to Snowflake")
-            return conn
+            if self.snowflake_conn is None or self.snowflake_conn.is_closed():
+                self.snowflake_conn = get_conn()
+                logger.info("Successfully connected to Snowflake")
+            return self.snowflake_conn
         except Exception as e:
             logger.error(f"Failed to connect to Snowflake: {e}")
             raise
     
     def _get_all_tickers_from_snowflake(self) -> List[str]:
-        """Retrieve all 110 ticker symbols from Snowflake database."""
+        """Retrieve all 110 ticker symbols from Snowflake database, or from the local cache if fresh."""
+        try:
+            if time.time() - os.path.getmtime(self.tickers_cache_file) < self.TICKERS_CACHE_TTL:
+                with open(self.tickers_cache_file, encoding='utf-8') as f:
+                    tickers = json.load(f)
+                logger.info(f"Loaded {len(tickers)} tickers from {self.tickers_cache_file}")
+                return tickers
+        except (OSError, ValueError):
+            pass
+        
         try:
-            self.snowflake_conn = self._connect_to_snowflake()
-            cursor = self.snowflake_conn.cursor()
+            cursor = self._connect_to_snowflake().cursor()
             
             query = "SELECT TICKER_SYMBOL FROM DEMODB.EQUITY_RESEARCH.SP_SECTOR_COMPANIES ORDER BY TICKER_SYMBOL"
             logger.info(f"Executing query: {query}")
@@ -99,15 +175,53 @@ class VectorizedScannerTestPipeline:
             logger.info(f"Retrieved {len(tickers)} tickers from Snowflake")
             
             cursor.close()
+            self._cache_tickers(tickers)
             return tickers
             
         except Exception as e:
             logger.error(f"Failed to retrieve tickers from Snowflake: {e}")
             raise
-        finally:
-            if self.snowflake_conn:
-                self.snowflake_conn.close()
-                logger.info("Snowflake connection closed")
+    
+    def _cache_tickers(self, tickers: List[str]) -> None:
+        """Store the ticker list; written to a temp file and renamed so readers never see partial files."""
+        if not tickers:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.tickers_cache_file), exist_ok=True)
+            tmp_path = f"{self.tickers_cache_file}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(tickers, f)
+            os.replace(tmp_path, self.tickers_cache_file)
+        except OSError as e:
+            logger.warning(f"Could not cache tickers: {e}")
+    
+    def _load_checkpoint(self) -> Dict[str, List[str]]:
+        """Return the tickers last uploaded in each part file, keyed by S3 filename."""
+        completed = {}
+        try:
+            with open(self.checkpoint_file, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        completed[entry['file']] = entry['tickers']
+                    except (ValueError, KeyError, TypeError):
+                        pass  # a line cut short by an interrupted write, or an older format
+        except OSError:
+            pass
+        return completed
+    
+    def _record_completed(self, s3_filename: str, tickers: List[str]) -> None:
+        """Append an uploaded part to the checkpoint as one write, flushed to disk before returning."""
+        data = json.dumps({'file': s3_filename, 'tickers': sorted(tickers)}) + '\n'
+        with self._checkpoint_lock:
+            try:
+                os.makedirs(os.path.dirname(self.checkpoint_file), exist_ok=True)
+                with open(self.checkpoint_file, 'a', encoding='utf-8') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                logger.warning(f"Could not update checkpoint: {e}")
     
     def _initialize_s3_client(self) -> boto3.client:
         """Initialize AWS S3 client with specified credentials."""
@@ -115,7 +229,14 @@ class VectorizedScannerTestPipeline:
             # Set AWS credentials directory
             os.environ['AWS_SHARED_CREDENTIALS_FILE'] = os.path.join(self.aws_credentials_dir, 'credentials')
             
-            s3_client = boto3.client('s3')
+            # Pool sized above UPLOAD_WORKERS so concurrent uploads never wait for a connection;
+            # adaptive retries back off on 503 SlowDown
+            config = Config(
+                max_pool_connections=64,
+                retries={'mode': 'adaptive', 'max_attempts': 10},
+                tcp_keepalive=True
+            )
+            s3_client = boto3.client('s3', config=config)
             # Test the connection
             s3_client.head_bucket(Bucket=self.S3_BUCKET)
             logger.info(f"S3 client initialized successfully for bucket: {self.S3_BUCKET}")
@@ -133,18 +254,24 @@ class VectorizedScannerTestPipeline:
         params = {
             'apikey': self.polygon_api_key,
             'adjusted': 'true',
-            'sort': 'asc'
+            'sort': 'asc',
+            'limit': 50000  # API maximum; the whole date range comes back in one response
         }
         
         try:
-            logger.info(f"Fetching data for {ticker} from {start_date} to {end_date}")
-            response = requests.get(url, params=params, timeout=30)
+            waited = self.rate_limiter.wait()
+            if waited:
+                logger.debug(f"Rate limiting: waited {waited:.1f} seconds before fetching {ticker}")
+            
+            logger.debug(f"Fetching data for {ticker} from {start_date} to {end_date}")
+            response = self.session.get(url, params=params, timeout=30)
+            self.rate_limiter.update(response.headers)
             response.raise_for_status()
             
-            data = response.json()
+            data = _json_loads(response.content)
             
             if data.get('status') == 'OK' and data.get('results'):
-                logger.info(f"Successfully retrieved {len(data['results'])} records for {ticker}")
+                logger.debug(f"Successfully retrieved {len(data['results'])} records for {ticker}")
                 return data
             else:
                 logger.warning(f"No data available for {ticker} in the specified date range")
@@ -154,172 +281,137 @@ class VectorizedScannerTestPipeline:
             logger.error(f"Failed to fetch data for {ticker}: {e}")
             return None
     
-    def _process_data_to_dataframe(self, ticker: str, data: Dict[str, Any]) -> Optional[pd.DataFrame]:
-        """Process API data and convert to DataFrame."""
-        if not data.get('results'):
+    def _process_data_to_table(self, ticker: str, data: Dict[str, Any]) -> Optional[pa.Table]:
+        """Process API data into an Arrow table with the Parquet schema."""
+        results = data.get('results')
+        if not results:
             return None
         
-        # Convert API results to DataFrame
-        records = []
-        for result in data['results']:
-            # Convert Unix timestamp (milliseconds) to datetime in Eastern Time
-            utc_dt = datetime.fromtimestamp(result['t'] / 1000, tz=timezone.utc)
-            et_tz = pytz.timezone('US/Eastern')
-            date = utc_dt.astimezone(et_tz)
-            
-            record = {
-                'TICKER': ticker,
-                'OHLC_DATE': date.strftime('%Y-%m-%d'),
-                'OPEN_PRICE': result['o'],
-                'HIGH_PRICE': result['h'],
-                'LOW_PRICE': result['l'],
-                'CLOSE_PRICE': result['c'],
-                'TRADING_VOLUME': result['v'],
-                'OHLC_TIMESTAMP': result['t']  # Keep milliseconds for conversion
-            }
-            records.append(record)
+        # Build Arrow columns straight from the API records, no pandas intermediate
+        timestamps = pa.array([r['t'] for r in results], type=pa.timestamp('ms'))  # UTC
         
-        df = pd.DataFrame(records)
-        df['OHLC_DATE'] = pd.to_datetime(df['OHLC_DATE'])
-        # Convert OHLC_TIMESTAMP to datetime for TIMESTAMP_MICROS format
-        df['OHLC_TIMESTAMP'] = pd.to_datetime(df['OHLC_TIMESTAMP'], unit='ms')
+        # Trading date is the calendar day in US/Eastern
+        local_times = pc.local_timestamp(timestamps.cast(pa.timestamp('ms', tz='US/Eastern')))
         
-        logger.info(f"Processed {len(df)} records for {ticker}")
-        return df
+        table = pa.table({
+            'TICKER': pa.array([ticker] * len(results), type=pa.string()),
+            'OHLC_DATE': pc.floor_temporal(local_times, unit='day'),
+            'OPEN_PRICE': pa.array([r['o'] for r in results], type=pa.float64()),
+            'HIGH_PRICE': pa.array([r['h'] for r in results], type=pa.float64()),
+            'LOW_PRICE': pa.array([r['l'] for r in results], type=pa.float64()),
+            'CLOSE_PRICE': pa.array([r['c'] for r in results], type=pa.float64()),
+            'TRADING_VOLUME': pa.array([r['v'] for r in results], type=pa.float64()),
+            'OHLC_TIMESTAMP': timestamps
+        }).cast(PARQUET_SCHEMA)
+        
+        logger.debug(f"Processed {table.num_rows} records for {ticker}")
+        return table
     
-    def _save_and_upload_to_s3_flat(self, ticker: str, df: pd.DataFrame) -> bool:
-        """Save DataFrame to Parquet and upload directly to S3 bucket root (flat structure)."""
+    def _upload_parquet(self, s3_filename: str, tables: List[pa.Table]) -> bool:
+        """Write tables as one Parquet file in memory and upload it to the S3 bucket root (flat structure)."""
         try:
-            # Create filename for S3 root (no subdirectories) - single file per ticker
-            s3_filename = f"{ticker}_2023_2025.parquet"
-            local_filename = s3_filename
-            
-            # Create schema with TIMESTAMP_MICROS for Snowflake compatibility
-            schema = pa.schema([
-                pa.field('TICKER', pa.string()),
-                pa.field('OHLC_DATE', pa.timestamp('us')),
-                pa.field('OPEN_PRICE', pa.float64()),
-                pa.field('HIGH_PRICE', pa.float64()),
-                pa.field('LOW_PRICE', pa.float64()),
-                pa.field('CLOSE_PRICE', pa.float64()),
-                pa.field('TRADING_VOLUME', pa.float64()),
-                pa.field('OHLC_TIMESTAMP', pa.timestamp('us'))  # Microsecond precision
-            ])
+            # Written together as a single row group
+            table = pa.concat_tables(tables).combine_chunks()
             
-            # Convert to Parquet format
-            table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
-            pq.write_table(table, local_filename, compression='snappy')
+            # Convert to Parquet format in memory; no local file to write, re-read and delete
+            buffer = pa.BufferOutputStream()
+            pq.write_table(table, buffer,
+                           compression=self.COMPRESSION,
+                           compression_level=self.COMPRESSION_LEVEL,
+                           use_dictionary=True,
+                           data_page_size=1 << 20,
+                           row_group_size=max(table.num_rows, 1))
+            parquet_bytes = buffer.getvalue()
             
-            logger.info(f"Created Parquet file: {local_filename} ({len(df)} records)")
+            logger.info(f"Created Parquet data for {s3_filename} ({table.num_rows} records, {parquet_bytes.size:,} bytes)")
             
             # Upload directly to S3 bucket root (flat structure)
             if not self.s3_client:
                 self.s3_client = self._initialize_s3_client()
             
-            self.s3_client.upload_file(
-                local_filename,
+            self.s3_client.upload_fileobj(
+                io.BytesIO(parquet_bytes),
                 self.S3_BUCKET,
-                s3_filename  # No subdirectory - directly in bucket root
+                s3_filename,  # No subdirectory - directly in bucket root
+                Config=self.transfer_config
             )
             
             logger.info(f"Successfully uploaded {s3_filename} to S3 bucket root")
-            
-            # Clean up local file
-            os.remove(local_filename)
-            logger.info(f"Cleaned up local file: {local_filename}")
-            
             return True
             
         except Exception as e:
-            logger.error(f"Failed to save and upload data for {ticker}: {e}")
-            # Clean up local file if it exists
-            if 'local_filename' in locals() and os.path.exists(local_filename):
-                try:
-                    os.remove(local_filename)
-                except:
-                    pass
+            logger.error(f"Failed to save and upload {s3_filename}: {e}")
             return False
     
-    def _generate_date_ranges(self) -> List[tuple]:
-        """Generate date ranges for API calls (monthly to respect rate limits)."""
-        date_ranges = []
-        current_date = datetime.strptime(self.START_DATE, '%Y-%m-%d')
-        end_date = datetime.strptime(self.END_DATE, '%Y-%m-%d')
+    def _plan_parts(self, tickers: List[str]) -> List[tuple]:
+        """Split the sorted ticker list into fixed (s3_filename, tickers) parts.
         
-        while current_date <= end_date:
-            # Calculate the last day of the current month
-            if current_date.month == 12:
-                next_month = current_date.replace(year=current_date.year + 1, month=1, day=1)
-            else:
-                next_month = current_date.replace(month=current_date.month + 1, day=1)
-            
-            month_end = next_month - timedelta(days=1)
-            
-            # Don't go beyond the specified end date
-            if month_end > end_date:
-                month_end = end_date
-            
-            date_ranges.append((
-                current_date.strftime('%Y-%m-%d'),
-                month_end.strftime('%Y-%m-%d')
-            ))
-            
-            current_date = next_month
-            
-            # Break if we've reached the end date
-            if current_date > end_date:
-                break
+        The same ticker list always gives the same parts and names, so a rerun or resume
+        overwrites its earlier files instead of adding duplicates next to them.
+        """
+        tickers = sorted(tickers)
+        return [
+            (f"sp500_2023_2025_part{n:03d}.parquet", tickers[i:i + self.TICKERS_PER_FILE])
+            for n, i in enumerate(range(0, len(tickers), self.TICKERS_PER_FILE), 1)
+        ]
+    
+    def _delete_stale_files(self, keep: set) -> None:
+        """Delete this pipeline's Parquet files in the bucket root that are not in keep.
+        
+        The stage COPY scripts load the whole bucket, so per-ticker files and parts from an
+        earlier layout would load the same rows twice.
+        """
+        stale = []
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.S3_BUCKET):
+            for obj in page.get('Contents', []):
+                key = obj['Key']
+                if '/' in key or key in keep:
+                    continue
+                if key.startswith('sp500_2023_2025_') or key.endswith('_2023_2025.parquet'):
+                    stale.append(key)
+        
+        # delete_objects takes at most 1000 keys per request
+        for i in range(0, len(stale), 1000):
+            response = self.s3_client.delete_objects(
+                Bucket=self.S3_BUCKET,
+                Delete={'Objects': [{'Key': key} for key in stale[i:i + 1000]]}
+            )
+            for error in response.get('Errors', []):
+                logger.error(f"Failed to delete {error['Key']}: {error['Message']}")
         
-        logger.info(f"Generated {len(date_ranges)} monthly date ranges")
-        return date_ranges
+        if stale:
+            logger.info(f"Deleted {len(stale)} stale Parquet files from {self.S3_BUCKET}")
     
-    def process_ticker(self, ticker: str) -> bool:
-        """Process a single ticker for the entire date range."""
-        logger.info(f"Starting processing for ticker: {ticker}")
+    def _submit_part(self, upload_pool: ThreadPoolExecutor, s3_filename: str, pending: List[tuple]):
+        """Queue one combined Parquet file for (ticker, table) pairs; returns (future, tickers)."""
+        pending = sorted(pending, key=lambda item: item[0])
+        part_tickers = [ticker for ticker, _ in pending]
+        future = upload_pool.submit(self._upload_parquet, s3_filename, [table for _, table in pending])
         
-        try:
-            date_ranges = self._generate_date_ranges()
-            all_dataframes = []
-            
-            for start_date, end_date in date_ranges:
-                # Rate limiting
-                logger.info(f"Rate limiting: waiting {self.RATE_LIMIT_DELAY} seconds...")
-                time.sleep(self.RATE_LIMIT_DELAY)
-                
-                # Fetch data from Polygon.io
-                data = self._get_polygon_data(ticker, start_date, end_date)
-                
-                if data:
-                    # Process data to DataFrame
-                    df = self._process_data_to_dataframe(ticker, data)
-                    if df is not None and not df.empty:
-                        all_dataframes.append(df)
-                else:
-                    logger.warning(f"No data retrieved for {ticker} from {start_date} to {end_date}")
-            
-            if all_dataframes:
-                # Combine all monthly data into single DataFrame
-                combined_df = pd.concat(all_dataframes, ignore_index=True)
-                combined_df = combined_df.sort_values('OHLC_DATE').reset_index(drop=True)
-                
-                logger.info(f"Combined {len(combined_df)} total records for {ticker}")
-                
-                # Save and upload single file for entire date range
-                success = self._save_and_upload_to_s3_flat(ticker, combined_df)
-                
-                if success:
-                    logger.info(f"✓ Successfully processed {ticker} ({len(combined_df)} records)")
-                    return True
-                else:
-                    logger.error(f"✗ Failed to upload data for {ticker}")
-                    return False
-            else:
-                logger.warning(f"No data available for {ticker} in the entire date range")
-                return False
-            
-        except Exception as e:
-            logger.error(f"Error processing ticker {ticker}: {e}")
-            return False
+        def checkpoint(done):
+            if done.result():
+                self._record_completed(s3_filename, part_tickers)
+        
+        future.add_done_callback(checkpoint)
+        return future, part_tickers
+    
+    def _fetch_ticker(self, ticker: str) -> Optional[pa.Table]:
+        """Fetch and process a single ticker for the entire date range; None if there is no data."""
+        logger.debug(f"Starting processing for ticker: {ticker}")
+        
+        # One request covers the whole date range (about 520 daily bars, well under the limit)
+        data = self._get_polygon_data(ticker, self.START_DATE, self.END_DATE)
+        if not data:
+            logger.warning(f"No data available for {ticker} in the entire date range")
+            return None
+        
+        # Results come back sorted by timestamp (sort=asc)
+        table = self._process_data_to_table(ticker, data)
+        if table is None or table.num_rows == 0:
+            logger.warning(f"No data available for {ticker} in the entire date range")
+            return None
+        return table
     
     def run(self) -> None:
         """Run the vectorized scanner test pipeline."""
@@ -346,43 +438,102 @@ class VectorizedScannerTestPipeline:
             logger.info("Step 2: Initializing S3 client...")
             self.s3_client = self._initialize_s3_client()
             
+            parts = self._plan_parts(tickers)
+            part_names = {s3_filename for s3_filename, _ in parts}
+            if self.force:
+                if os.path.exists(self.checkpoint_file):
+                    os.remove(self.checkpoint_file)
+                logger.info("--force: cleared checkpoint, reprocessing all tickers")
+                completed = {}
+            else:
+                completed = self._load_checkpoint()
+            
+            # A part is skipped only when its uploaded file holds exactly the tickers planned for
+            # it now; a partial upload, or a ticker list change that shifts the slices, refetches
+            # the whole part so its file is rewritten with the current membership
+            todo_parts = [(s3_filename, part) for s3_filename, part in parts if completed.get(s3_filename) != part]
+            if len(todo_parts) < len(parts):
+                logger.info(f"Skipping {len(parts) - len(todo_parts)} parts already uploaded (see {self.checkpoint_file}; use --force to redo)")
+            if not todo_parts:
+                logger.info("All tickers already uploaded. Nothing to do.")
+                self._delete_stale_files(keep=part_names)
+                return
+            
+            part_of = {ticker: s3_filename for s3_filename, part in todo_parts for ticker in part}
+            unfetched = {s3_filename: len(part) for s3_filename, part in todo_parts}
+            fetched = {s3_filename: [] for s3_filename, _ in todo_parts}
+            tickers = [ticker for _, part in todo_parts for ticker in part]
+            
             # Step 3: Process each ticker
             logger.info(f"Step 3: Processing {len(tickers)} tickers...")
             successful_tickers = 0
             failed_tickers = []
             
-            # Calculate estimated time
-            total_months = len(self._generate_date_ranges())
-            total_api_calls = len(tickers) * total_months
+            # Calculate estimated time (one API call per ticker)
+            total_api_calls = len(tickers)
             estimated_hours = (total_api_calls * self.RATE_LIMIT_DELAY) / 3600
             logger.info(f"Estimated processing time: ~{estimated_hours:.1f} hours ({total_api_calls} API calls)")
             
             start_time = datetime.now()
             
-            for i, ticker in enumerate(tickers, 1):
-                logger.info(f"Processing ticker {i}/{len(tickers)}: {ticker}")
-                
-                try:
-                    if self.process_ticker(ticker):
-                        successful_tickers += 1
-                        logger.info(f"✓ Successfully processed {ticker}")
-                    else:
-                        failed_tickers.append(ticker)
-                        logger.error(f"✗ Failed to process {ticker}")
+            # Tickers are fetched concurrently (the shared rate limiter spaces the API calls);
+            # once every ticker of a part has been fetched, the part is combined into one Parquet
+            # file, whose write and S3 upload go to a separate pool so upload latency never holds
+            # up the next API call. Fewer, larger files suit the vectorized scanner better than
+            # one per ticker.
+            upload_futures = {}
+            with ThreadPoolExecutor(max_workers=self.UPLOAD_WORKERS) as upload_pool:
+                with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(tickers))) as fetch_pool:
+                    futures = {fetch_pool.submit(self._fetch_ticker, ticker): ticker for ticker in tickers}
+                    
+                    for i, future in enumerate(as_completed(futures), 1):
+                        ticker = futures[future]
+                        logger.info(f"Fetched ticker {i}/{len(tickers)}: {ticker}")
+                        
+                        try:
+                            table = future.result()
+                        except Exception as e:
+                            table = None
+                            logger.error(f"Exception processing {ticker}: {e}")
+                        
+                        s3_filename = part_of[ticker]
+                        if table is None:
+                            failed_tickers.append(ticker)
+                            logger.error(f"✗ Failed to process {ticker}")
+                        else:
+                            fetched[s3_filename].append((ticker, table))
+                        
+                        unfetched[s3_filename] -= 1
+                        if unfetched[s3_filename] == 0 and fetched[s3_filename]:
+                            future, part_tickers = self._submit_part(upload_pool, s3_filename, fetched.pop(s3_filename))
+                            upload_futures[future] = part_tickers
                         
-                except Exception as e:
-                    failed_tickers.append(ticker)
-                    logger.error(f"Exception processing {ticker}: {e}")
+                        # Progress update every 10 tickers
+                        if i % 10 == 0:
+                            elapsed = datetime.now() - start_time
+                            remaining = len(tickers) - i
+                            avg_time_per_ticker = elapsed.total_seconds() / i
+                            estimated_remaining = timedelta(seconds=avg_time_per_ticker * remaining)
+                            
+                            logger.info(f"Progress: {i}/{len(tickers)} ({i/len(tickers)*100:.1f}%)")
+                            logger.info(f"Elapsed: {elapsed}, Estimated remaining: {estimated_remaining}")
                 
-                # Progress update every 10 tickers
-                if i % 10 == 0:
-                    elapsed = datetime.now() - start_time
-                    remaining = len(tickers) - i
-                    avg_time_per_ticker = elapsed.total_seconds() / i
-                    estimated_remaining = timedelta(seconds=avg_time_per_ticker * remaining)
-                    
-                    logger.info(f"Progress: {i}/{len(tickers)} ({i/len(tickers)*100:.1f}%)")
-                    logger.info(f"Elapsed: {elapsed}, Estimated remaining: {estimated_remaining}")
+                # Wait for the remaining uploads
+                for future in as_completed(upload_futures):
+                    part_tickers = upload_futures[future]
+                    if future.result():
+                        successful_tickers += len(part_tickers)
+                        logger.info(f"✓ Successfully processed {', '.join(part_tickers)}")
+                    else:
+                        failed_tickers.extend(part_tickers)
+                        logger.error(f"✗ Failed to upload data for {', '.join(part_tickers)}")
+            
+            # Old files are removed only once every planned part is in place, so a failed run
+            # never leaves the stage emptier than it found it
+            if failed_tickers:
+                logger.warning("Keeping earlier Parquet files in the bucket until every part uploads")
+            else:
+                self._delete_stale_files(keep=part_names)
             
             # Summary
             total_time = datetime.now() - start_time
@@ -413,16 +564,25 @@ class VectorizedScannerTestPipeline:
         except Exception as e:
             logger.error(f"Pipeline execution failed: {e}")
             raise
+        finally:
+            if self.snowflake_conn and not self.snowflake_conn.is_closed():
+                self.snowflake_conn.close()
+                logger.info("Snowflake connection closed")
 
 
 def main():
     """Main entry point."""
+    parser = argparse.ArgumentParser(description="Vectorized scanner test pipeline")
+    parser.add_argument('--force', action='store_true',
+                        help='Re-download every ticker, ignoring the completed-ticker checkpoint')
+    args = parser.parse_args()
+    
     try:
         if not os.path.exists('config.json'):
             logger.error("config.json not found")
             sys.exit(1)
         
-        pipeline = VectorizedScannerTestPipeline()
+        pipeline = VectorizedScannerTestPipeline(force=args.force)
         pipeline.run()
         
     except KeyboardInterrupt: